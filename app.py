@@ -10,17 +10,77 @@ A specialized blog generation system for Safety Products Global's brand portfoli
 import streamlit as st
 import os
 import re
-import contextlib
+import copy
+import functools
+import html
+import io
+import ipaddress
 import json
+import logging
+import queue
+import socket
+import string
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, Tuple
 from urllib.parse import urlparse
 from dotenv import load_dotenv
-from blog_orchestrator import BlogAgentOrchestrator
-from sheets_manager import create_sheets_manager
+import pyromark
 from keyword_research import create_keyword_researcher
-from brand_config import get_brand_config, get_all_brands, get_effective_style_source, BrandConfig
+from brand_config import get_brand_config, get_all_brands, get_effective_style_source, BrandConfig, ProductInfo
 
-# Load environment variables (override=True ensures .env takes precedence over system env vars)
-load_dotenv(override=True)
+logger = logging.getLogger(__name__)
+
+# Characters allowed in a single DNS label (hostnames are lowercased by urlparse)
+_HOSTNAME_LABEL_CHARS = frozenset(string.ascii_lowercase + string.digits + '-')
+
+# Domain part of a blog URL, used as a trending-keyword seed
+_DOMAIN_RE = re.compile(r'https?://(?:www\.)?([^/]+)')
+
+# Blocked localhost and loopback names
+_LOCALHOST_NAMES = frozenset({'localhost', 'localhost.localdomain'})
+
+# Blocked cloud metadata endpoints by hostname
+_METADATA_HOSTNAMES = frozenset({
+    'metadata.google.internal',
+    'metadata.google.com',
+    'metadata',
+    'instance-data'
+})
+
+# Seconds a hostname's resolved addresses are reused before resolving again
+_DNS_CACHE_TTL = 300
+
+
+@dataclass(frozen=True)
+class _EnvConfig:
+    """Configuration env vars the app reads."""
+    openai_api_key: str
+    spreadsheet_id: str
+    credentials_path: str
+    service_account_json: str
+
+
+@st.cache_resource
+def _env_config():
+    """
+    Load .env and snapshot the configuration env vars once per process.
+
+    The main script is re-executed on every rerun, so module-level reads would
+    run again each time; cache_resource keeps one snapshot for the process.
+    """
+    # Load environment variables (override=True ensures .env takes precedence over system env vars)
+    load_dotenv(override=True)
+    return _EnvConfig(
+        openai_api_key=os.environ.get("OPENAI_API_KEY", ""),
+        spreadsheet_id=os.environ.get("GOOGLE_SPREADSHEET_ID", ""),
+        credentials_path=os.environ.get("GOOGLE_APPLICATION_CREDENTIALS", ""),
+        service_account_json=os.environ.get("GOOGLE_SERVICE_ACCOUNT_JSON", "")
+    )
 
 
 def load_google_sheets_credentials():
@@ -32,12 +92,12 @@ def load_google_sheets_credentials():
     2. GOOGLE_SERVICE_ACCOUNT_JSON - raw JSON string (for deployments)
 
     Returns:
-        tuple: (service_account_json, spreadsheet_id) or (None, None) if not configured
+        tuple: (service_account_info, spreadsheet_id) or (None, None) if not configured,
+        where service_account_info is the parsed service account dict
     """
-    spreadsheet_id = os.environ.get("GOOGLE_SPREADSHEET_ID", "")
-
-    # Method 1: File path
-    creds_path = os.environ.get("GOOGLE_APPLICATION_CREDENTIALS", "")
+    env = _env_config()
+    creds_path = env.credentials_path
+    creds_mtime = None
     if creds_path:
         # Handle relative paths - make them relative to project directory
         if not os.path.isabs(creds_path):
@@ -45,39 +105,112 @@ def load_google_sheets_credentials():
             creds_path = os.path.join(project_dir, creds_path)
 
         if os.path.isfile(creds_path):
-            try:
-                with open(creds_path, 'r') as f:
-                    service_account_json = f.read()
-                if spreadsheet_id:
-                    return service_account_json, spreadsheet_id
-            except Exception as e:
-                print(f"Error reading credentials file: {e}")
+            creds_mtime = os.path.getmtime(creds_path)
+
+    return _load_google_sheets_credentials(
+        env.spreadsheet_id,
+        creds_path,
+        creds_mtime,
+        env.service_account_json
+    )
+
+
+@st.cache_resource(show_spinner=False)
+def _load_google_sheets_credentials(spreadsheet_id, creds_path, creds_mtime, service_account_json_env):
+    """Resolve Sheets credentials from explicit env values so the cache key tracks env changes."""
+    # Method 1: File path
+    if creds_path and creds_mtime is not None:
+        try:
+            with open(creds_path, 'r') as f:
+                service_account_json = f.read()
+            if spreadsheet_id:
+                return json.loads(service_account_json), spreadsheet_id
+        except Exception as e:
+            logger.warning("Error reading credentials file: %s", e)
 
     # Method 2: Raw JSON string
-    service_account_json = os.environ.get("GOOGLE_SERVICE_ACCOUNT_JSON", "")
-    if service_account_json and spreadsheet_id:
-        return service_account_json, spreadsheet_id
+    if service_account_json_env and spreadsheet_id:
+        try:
+            return json.loads(service_account_json_env), spreadsheet_id
+        except ValueError as e:
+            logger.warning("Error parsing GOOGLE_SERVICE_ACCOUNT_JSON: %s", e)
 
     return None, None
 
-@contextlib.contextmanager
-def temporary_env_var(key, value):
-    """Securely set temporary environment variable with guaranteed cleanup."""
-    old_value = os.environ.get(key)
+
+def _is_valid_hostname(hostname):
+    """Check that a hostname is a dotted IPv4 literal or a DNS name with an alphabetic TLD."""
+    if hostname.endswith('.'):
+        hostname = hostname[:-1]
+
+    if not hostname.isascii() or len(hostname) > 253:
+        return False
+
+    labels = hostname.split('.')
+
+    # IPv4 literal
+    if len(labels) == 4 and all(label.isdigit() and len(label) <= 3 for label in labels):
+        return True
+
+    # Domain name: at least one label plus an alphabetic TLD
+    if len(labels) < 2 or not (2 <= len(labels[-1]) <= 63 and labels[-1].isalpha()):
+        return False
+
+    for label in labels:
+        if not label or len(label) > 63 or label[0] == '-' or label[-1] == '-':
+            return False
+        if not _HOSTNAME_LABEL_CHARS.issuperset(label):
+            return False
+
+    return True
+
+
+@st.cache_data(ttl=_DNS_CACHE_TTL, max_entries=256, show_spinner=False)
+def _resolve_hostname(hostname):
+    """
+    Resolve a hostname to its IP address strings.
+
+    Both A and AAAA records are requested so IPv6-only hosts resolve and every
+    address reaches the SSRF checks, and SOCK_STREAM collapses the per-socket-type
+    duplicates into one entry per address. IP literals are returned as-is without
+    calling the resolver.
+    """
     try:
-        os.environ[key] = value
-        yield
-    finally:
-        if old_value is None:
-            os.environ.pop(key, None)
-        else:
-            os.environ[key] = old_value
+        return (str(ipaddress.ip_address(hostname)),)
+    except ValueError:
+        pass
+
+    addr_info = socket.getaddrinfo(
+        hostname, None, family=socket.AF_UNSPEC, type=socket.SOCK_STREAM, proto=socket.IPPROTO_TCP
+    )
+    return tuple(addr[4][0] for addr in addr_info)
+
 
 def validate_blog_url(url):
     """Validate and sanitize blog URL input to prevent SSRF attacks."""
-    import ipaddress
-    import socket
+    prevalidated = _prevalidated_brand_urls().get(url)
+    if prevalidated:
+        return prevalidated
+    return _validate_blog_url(url)
+
+
+@st.cache_resource(show_spinner=False)
+def _prevalidated_brand_urls():
+    """Validate every brand's default style source once per process."""
+    prevalidated = {}
+    for brand in get_all_brands():
+        source = get_effective_style_source(brand)
+        if source and source not in prevalidated:
+            try:
+                prevalidated[source] = _validate_blog_url(source)
+            except ValueError as e:
+                logger.warning("Could not pre-validate style source for %s: %s", brand.name, e)
+    return prevalidated
+
 
+@st.cache_data(ttl=300, show_spinner=False)
+def _validate_blog_url(url):
+    """Full SSRF validation: URL shape, blocked hostnames and resolved IP ranges."""
     if not url or not url.strip():
         return None
 
@@ -88,45 +221,37 @@ def validate_blog_url(url):
         url = 'https://' + url
 
     # Basic URL format validation
-    url_pattern = re.compile(
-        r'^https?://'  # http:// or https://
-        r'(?:(?:[A-Z0-9](?:[A-Z0-9-]{0,61}[A-Z0-9])?\.)+[A-Z]{2,6}\.?|'  # domain
-        r'\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})'  # IP
-        r'(?::\d+)?'  # optional port
-        r'(?:/?|[/?]\S+)$', re.IGNORECASE)
-
-    if not url_pattern.match(url):
+    if any(ch.isspace() for ch in url):
         raise ValueError("Invalid URL format")
 
     parsed = urlparse(url)
 
-    if not parsed.hostname:
+    if parsed.scheme not in ('http', 'https') or parsed.username or parsed.password:
+        raise ValueError("Invalid URL format")
+
+    try:
+        parsed.port  # Raises ValueError for non-numeric or out-of-range ports
+    except ValueError:
+        raise ValueError("Invalid URL format")
+
+    if not parsed.hostname or not _is_valid_hostname(parsed.hostname):
         raise ValueError("Invalid hostname")
 
     hostname = parsed.hostname.lower()
 
     # Block localhost and loopback names
-    localhost_names = ['localhost', 'localhost.localdomain']
-    if hostname in localhost_names:
+    if hostname in _LOCALHOST_NAMES:
         raise ValueError("Access to localhost is not allowed")
 
     # Block cloud metadata endpoints by hostname
-    metadata_hostnames = [
-        'metadata.google.internal',
-        'metadata.google.com',
-        'metadata',
-        'instance-data'
-    ]
-    if hostname in metadata_hostnames:
+    if hostname in _METADATA_HOSTNAMES:
         raise ValueError("Access to metadata endpoints is not allowed")
 
     # Resolve hostname to IP and validate
     try:
-        addr_info = socket.getaddrinfo(hostname, None)
-
-        for addr in addr_info:
-            ip_str = addr[4][0]
+        ip_strings = _resolve_hostname(hostname)
 
+        for ip_str in ip_strings:
             try:
                 ip = ipaddress.ip_address(ip_str)
 
@@ -134,11 +259,11 @@ def validate_blog_url(url):
                 if ip.is_loopback:
                     raise ValueError("Access to loopback addresses is not allowed")
 
-                # Block private networks (10.0.0.0/8, 172.16.0.0/12, 192.168.0.0/16, fc00::/7)
+                # Block private networks (0.0.0.0/8, 10.0.0.0/8, 172.16.0.0/12, 192.168.0.0/16, fc00::/7)
                 if ip.is_private:
                     raise ValueError("Access to private network ranges is not allowed")
 
-                # Block link-local (169.254.0.0/16, fe80::/10)
+                # Block link-local (169.254.0.0/16 incl. the 169.254.169.254 metadata endpoint, fe80::/10)
                 if ip.is_link_local:
                     raise ValueError("Access to link-local addresses is not allowed")
 
@@ -146,15 +271,9 @@ def validate_blog_url(url):
                 if ip.is_multicast:
                     raise ValueError("Access to multicast addresses is not allowed")
 
-                # Additional IPv4 checks
-                if isinstance(ip, ipaddress.IPv4Address):
-                    # Block 0.0.0.0/8
-                    if ip_str.startswith('0.'):
-                        raise ValueError("Invalid IP address")
-
-                    # Explicit cloud metadata check
-                    if ip_str == '169.254.169.254':
-                        raise ValueError("Access to cloud metadata endpoints is not allowed")
+                # Block reserved and unspecified ranges (240.0.0.0/4, 0.0.0.0, ::)
+                if ip.is_reserved or ip.is_unspecified:
+                    raise ValueError("Access to reserved addresses is not allowed")
 
             except ValueError as e:
                 # Re-raise validation errors
@@ -173,6 +292,128 @@ MAX_REQUIREMENTS_LENGTH = 2000
 MAX_API_KEY_LENGTH = 200
 MAX_AUTOPILOT_POSTS = 10
 
+# Auto-pilot results are written to Google Sheets in batches of this many posts
+AUTOPILOT_SHEETS_BATCH_SIZE = 5
+
+# Auto-pilot posts generated concurrently, and how often the UI polls them
+AUTOPILOT_MAX_WORKERS = 2
+AUTOPILOT_POLL_SECONDS = 2
+
+# Seconds a manually connected Sheets client is trusted before test_connection() runs again
+SHEETS_RECHECK_SECONDS = 60
+
+# Orchestrators (each with its own agent thread pool) kept alive across reruns and sessions
+ORCHESTRATOR_CACHE_SIZE = 8
+
+# Existing blog titles are re-extracted once their cached copy is older than this
+BLOG_TOPICS_MAX_AGE = timedelta(days=7)
+
+# How long looked-up blog titles are kept in process; the Sheets copy is only used while it is
+# younger than BLOG_TOPICS_MAX_AGE minus this, so titles are never older than BLOG_TOPICS_MAX_AGE
+BLOG_TOPICS_CACHE_TTL = timedelta(days=1)
+
+# Result views of a generated post, shown one at a time
+_RESULT_VIEWS = (
+    "📄 Final Post",
+    "🎨 Style Guide",
+    "🔍 Research & Analysis",
+    "✍️ Writer Draft",
+    "📊 Initial SEO Analysis",
+    "🔗 With Links",
+    "📊 Final SEO Analysis",
+)
+
+# Result views of each auto-pilot post
+_AUTOPILOT_RESULT_VIEWS = ("📄 Final Post", "🎨 Style Guide", "📊 SEO Analysis")
+
+# Labels for the partial results streamed in while a post is being generated
+_STAGE_LABELS = {
+    'style_guide': "🎨 Style Guide",
+    'research': "🔍 Research",
+    'draft': "✍️ Writer Draft",
+    'initial_seo_analysis': "📊 Initial SEO Analysis",
+    'with_links': "🔗 With Internal Links",
+    'final': "📄 Final Post",
+    'seo_analysis': "📈 Final SEO Report",
+}
+
+# Static page header and footer markup
+_HEADER_HTML = (
+    '<h1 style="text-align: center; margin-top: 1rem;">✍️ Safety Products Global</h1>'
+    '<p style="text-align: center; font-size: 1.1rem; margin-bottom: 2rem;"><strong>Multi-Brand Blog Content Generator</strong></p>'
+)
+_FOOTER_HTML = """
+<div style='text-align: center; color: gray; padding: 2rem 0;'>
+<p><strong>Safety Products Global</strong> - Multi-Brand Content Generation</p>
+<p style='font-size: 0.9rem; margin-top: 0.5rem;'>Slice | Klever Innovations | Pacific Handy Cutter</p>
+<p style='font-size: 0.8rem; margin-top: 0.5rem;'>Powered by OpenAI Agents SDK | Built by Bertram Labs</p>
+</div>
+"""
+
+# Standalone HTML page used for the "Download as HTML" export
+_HTML_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="UTF-8">
+    <title>{title}</title>
+    <style>
+        body {{ font-family: Arial, sans-serif; max-width: 800px; margin: 0 auto; padding: 20px; line-height: 1.6; }}
+        h1, h2, h3 {{ color: #333; }}
+        code {{ background-color: #f4f4f4; padding: 2px 4px; border-radius: 3px; }}
+        pre {{ background-color: #f4f4f4; padding: 10px; border-radius: 5px; overflow-x: auto; }}
+        blockquote {{ border-left: 4px solid #ddd; margin: 0; padding-left: 20px; font-style: italic; }}
+        a {{ color: #0066cc; text-decoration: none; }}
+        a:hover {{ text-decoration: underline; }}
+    </style>
+</head>
+<body>
+{body}
+</body>
+</html>"""
+
+# Session state keys used by auto-pilot and their initial values
+_AUTOPILOT_DEFAULTS = {
+    'autopilot_active': False,
+    'autopilot_stop_requested': False,
+    'autopilot_total_posts': 0,
+    'autopilot_completed_posts': 0,
+    'autopilot_current_topic': None,
+    'autopilot_topics_queue': [],
+    'autopilot_results': [],
+    'autopilot_errors': [],
+    'autopilot_cached_style': None,
+    'autopilot_style_lookup_attempted': False,
+    'autopilot_pending_writes': [],
+    'autopilot_jobs': [],
+    'autopilot_service_tier': None,
+}
+
+
+def _post_input_error(topic, requirements, api_key, reference_blog):
+    """
+    Server-side checks for the blog post form, in the order they are reported.
+
+    Returns:
+        The first error message, or None if every input is acceptable
+    """
+    topic = topic.strip()
+    if not topic:
+        return "Please enter a topic for your blog post"
+    if not reference_blog.strip():
+        return "Please enter a reference blog URL for style matching"
+    if len(topic) > MAX_TOPIC_LENGTH:
+        return f"Topic too long. Maximum {MAX_TOPIC_LENGTH} characters allowed."
+    if len(requirements) > MAX_REQUIREMENTS_LENGTH:
+        return f"Requirements too long. Maximum {MAX_REQUIREMENTS_LENGTH} characters allowed."
+    if len(api_key) > MAX_API_KEY_LENGTH:
+        return "Invalid API key format."
+    return None
+
+
+def _title_fingerprint(title):
+    """Case- and whitespace-insensitive fingerprint used to de-duplicate topic titles."""
+    return hash(title.strip().casefold())
+
 
 def get_available_topics_for_autopilot(session_state, sheets_manager=None):
     """
@@ -185,34 +426,346 @@ def get_available_topics_for_autopilot(session_state, sheets_manager=None):
     Returns:
         List of topic dicts available for generation
     """
-    available_topics = []
-
     # First, check session-generated topics (unused ones)
-    if 'generated_topics' in session_state and session_state.generated_topics:
-        for topic in session_state.generated_topics:
-            # Check if topic has been marked as used
-            if not topic.get('used', False):
-                available_topics.append(topic)
+    available_topics = [
+        topic for topic in session_state.get('generated_topics') or []
+        if not topic.get('used', False)
+    ]
+    seen_titles = {_title_fingerprint(t['title']) for t in available_topics}
 
     # If sheets enabled, also check for cached topics
-    if sheets_manager and len(available_topics) < MAX_AUTOPILOT_POSTS:
+    remaining = MAX_AUTOPILOT_POSTS - len(available_topics)
+    if sheets_manager and remaining > 0:
         try:
             # Get unused topics from Google Sheets
-            cached_topics = sheets_manager.get_unused_topic_ideas(
-                limit=MAX_AUTOPILOT_POSTS - len(available_topics)
+            cached_topics = _cached_unused_topic_ideas(
+                remaining, sheets_manager.current_brand, sheets_manager.spreadsheet_id, sheets_manager
             )
-            if cached_topics:
-                # Convert to standard format and avoid duplicates
-                existing_titles = {t['title'].lower() for t in available_topics}
-                for cached in cached_topics:
-                    if cached.get('title', '').lower() not in existing_titles:
-                        available_topics.append(cached)
+            # Avoid duplicates (fingerprint each title once), stop once the run is full
+            for cached in cached_topics or []:
+                fingerprint = _title_fingerprint(cached.get('title', ''))
+                if fingerprint not in seen_titles:
+                    seen_titles.add(fingerprint)
+                    available_topics.append(cached)
+                    remaining -= 1
+                    if not remaining:
+                        break
         except Exception as e:
-            print(f"Could not fetch cached topics from Sheets: {e}")
+            logger.warning("Could not fetch cached topics from Sheets: %s", e)
+
+        return available_topics
 
     return available_topics[:MAX_AUTOPILOT_POSTS]
 
 
+# Cached Google Sheets reads. st.cache_data is shared by every session and the underscore-
+# prefixed manager isn't hashed, so each takes the spreadsheet ID as a hashed argument to
+# keep sessions connected to different sheets apart (as does _fetch_blog_topics). Each is
+# cleared after the app writes the data it reads.
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _cached_unused_topic_ideas(limit, brand, spreadsheet_id, _sheets_manager):
+    """Unused Topic_Ideas rows for the auto-pilot preview, so slider moves and polls don't re-read the sheet."""
+    return _sheets_manager.get_unused_topic_ideas(limit=limit, brand=brand)
+
+
+@st.cache_data(ttl=86400, show_spinner=False)
+def _cached_style_guide(reference_blog, brand, spreadsheet_id, _sheets_manager):
+    """Style_Guides sheet lookup, only queried again after a day unless a new guide is saved."""
+    return _sheets_manager.get_cached_style_guide(reference_blog, brand)
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _history_and_stats(brand, spreadsheet_id, _sheets_manager):
+    """Recent content history and blog source stats from one Sheets request, reused for a minute."""
+    return _sheets_manager.get_history_and_stats(limit=10, brand=brand)
+
+
+def _parse_seo_score(seo_text):
+    """
+    Extract the numeric score from an SEO report's "SEO SCORE: NN/100" line.
+
+    Returns:
+        Score as an int, or None if the report has no parseable score line
+    """
+    for line in seo_text.splitlines():
+        if 'SEO SCORE:' in line:
+            try:
+                return int(line.split(':', 1)[1].strip().split('/', 1)[0])
+            except (IndexError, ValueError):
+                return None
+    return None
+
+
+def _render_read_only_text(content, label, height=400, help=None):
+    """
+    Show generated text in a fixed-height scrollable pane.
+
+    st.code has a built-in copy button and, unlike a text_area, no widget value
+    for Streamlit to track, so display-only text stays out of the widget state.
+
+    Args:
+        content: Text to show
+        label: Caption above the pane
+        height: Pane height in pixels
+        help: Optional caption tooltip
+    """
+    st.caption(label, help=help)
+    with st.container(height=height):
+        st.code(content, language=None, wrap_lines=True)
+
+
+def _render_seo_tab(seo_text, label, height=450, help=None, show_score=True):
+    """
+    Render an SEO report: a color-coded score banner (when one parses) and the full text.
+
+    Args:
+        seo_text: SEO analysis text from the SEO agent
+        label: Caption above the report
+        height: Report pane height in pixels
+        help: Optional caption tooltip
+        show_score: Whether to parse and show the "SEO SCORE:" line
+    """
+    score_num = _parse_seo_score(seo_text) if show_score else None
+    if score_num is not None:
+        if score_num >= 80:
+            st.success(f"🎯 **SEO Score: {score_num}/100** - Excellent!")
+        elif score_num >= 60:
+            st.warning(f"⚠️ **SEO Score: {score_num}/100** - Good with room for improvement")
+        else:
+            st.error(f"🔴 **SEO Score: {score_num}/100** - Needs optimization")
+
+    _render_read_only_text(seo_text, label, height=height, help=help)
+
+
+def _download_text_and_markdown(content, file_stem, text_label="📄 Download as Text",
+                                md_label="📝 Download as Markdown", key_prefix=None):
+    """
+    Text and markdown download buttons for one piece of content, side by side.
+
+    Args:
+        content: Content to download (encoded once, shared by both buttons)
+        file_stem: File name without extension
+        text_label: Label of the .txt button
+        md_label: Label of the .md button
+        key_prefix: Optional widget key prefix, needed when the pair repeats on a page
+    """
+    data = content.encode('utf-8')
+    col_txt, col_md = st.columns(2)
+    with col_txt:
+        st.download_button(
+            label=text_label,
+            data=data,
+            file_name=f"{file_stem}.txt",
+            mime="text/plain",
+            key=f"{key_prefix}_txt" if key_prefix else None,
+            use_container_width=True
+        )
+    with col_md:
+        st.download_button(
+            label=md_label,
+            data=data,
+            file_name=f"{file_stem}.md",
+            mime="text/markdown",
+            key=f"{key_prefix}_md" if key_prefix else None,
+            use_container_width=True
+        )
+
+
+@st.fragment
+def _raw_content_editor(content, key, label, help=None):
+    """
+    Editable raw text of a generated post, loaded on request.
+
+    The full article is only sent to the browser once "Load editable raw text" is
+    ticked. As a fragment, ticking it reruns just this block, so the results view
+    above (which only exists on the Generate rerun) stays on screen.
+    """
+    if st.checkbox("Load editable raw text", key=f"show_{key}"):
+        st.text_area(label, value=content, height=400, key=key, help=help)
+
+
+@st.fragment
+def _render_post_results(results, topic, reference_blog):
+    """
+    Show one result view of a generated post, picked with a horizontal radio.
+
+    Unlike st.tabs, only the selected view's text and widgets are sent to the
+    browser. As a fragment, switching views reruns just this block, so the results
+    (which only exist on the Generate rerun) stay on screen.
+    """
+    # Shared part of every download file name
+    file_slug = topic[:30].replace(' ', '_').lower()
+
+    view = st.radio("View", _RESULT_VIEWS, horizontal=True, key="active_result_view", label_visibility="collapsed")
+
+    if view == _RESULT_VIEWS[0]:
+        st.markdown("### Final Blog Post")
+
+        # Display formatted content
+        with st.container():
+            st.markdown("#### Preview")
+            # Show formatted markdown preview
+            st.markdown(results["final"])
+
+        # Raw content for editing
+        with st.expander("📝 Edit Raw Content", expanded=False):
+            _raw_content_editor(
+                results["final"],
+                "final_edit_area",
+                "Edit the blog post content:",
+                help="Copy your edits from here; downloads use the generated post"
+            )
+
+        final_content = results["final"]
+        # Encoded once and shared by the text and markdown downloads
+        final_bytes = final_content.encode('utf-8')
+        final_stem = f"blog_post_{file_slug}"
+
+        # Download options
+        st.markdown("#### Download Options")
+        col1, col2, col3 = st.columns(3)
+
+        with col1:
+            st.download_button(
+                label="📄 Download as Text",
+                data=final_bytes,
+                file_name=f"{final_stem}.txt",
+                mime="text/plain",
+                use_container_width=True
+            )
+
+        with col2:
+            st.download_button(
+                label="📝 Download as Markdown", 
+                data=final_bytes,
+                file_name=f"{final_stem}.md",
+                mime="text/markdown",
+                use_container_width=True
+            )
+
+        with col3:
+            # Convert markdown to HTML for download
+            st.download_button(
+                label="🌐 Download as HTML",
+                data=_render_html_export(final_content, topic),
+                file_name=f"{final_stem}.html",
+                mime="text/html",
+                use_container_width=True
+            )
+
+    elif view == _RESULT_VIEWS[1]:
+        st.markdown("### Extracted Style Guide")
+        st.markdown(f"*Style analysis from: {reference_blog}*")
+        _render_read_only_text(results["style_guide"], "Style Guide")
+
+    elif view == _RESULT_VIEWS[2]:
+        st.markdown("### Research & Analysis")
+        st.markdown("*Comprehensive research on the topic*")
+        if "research" in results:
+            _render_read_only_text(
+                results["research"],
+                "Research Results",
+                help="Detailed research findings and insights"
+            )
+        else:
+            st.info("Research results not available")
+
+    elif view == _RESULT_VIEWS[3]:
+        st.markdown("### Writer Draft")
+        st.markdown("*Initial blog post draft before SEO optimization*")
+        if "draft" in results:
+            # Display formatted content
+            with st.container():
+                st.markdown("#### Preview")
+                st.markdown(results["draft"])
+
+            # Raw content for editing
+            with st.expander("📝 Edit Draft Content", expanded=False):
+                _raw_content_editor(
+                    results["draft"],
+                    "draft_edit_area",
+                    "Edit the draft content:",
+                    help="Copy your edits from here; downloads use the generated draft"
+                )
+
+            # Download options for draft
+            st.markdown("#### Download Draft")
+            _download_text_and_markdown(
+                results["draft"],
+                f"draft_{file_slug}",
+                text_label="📄 Download Draft as Text",
+                md_label="📝 Download Draft as Markdown"
+            )
+        else:
+            st.info("Writer draft not available")
+
+    elif view == _RESULT_VIEWS[4]:
+        st.markdown("### Initial SEO Analysis")
+        st.markdown("*SEO optimization recommendations for the draft*")
+        if "initial_seo_analysis" in results:
+            _render_seo_tab(
+                results["initial_seo_analysis"],
+                "SEO Optimization Recommendations",
+                height=400,
+                help="SEO recommendations applied during editing",
+                show_score=False
+            )
+        else:
+            st.info("Initial SEO analysis not available")
+
+    elif view == _RESULT_VIEWS[5]:
+        st.markdown("### Content With Internal Links")
+        st.markdown("*Blog post with strategic SEO-optimized internal links*")
+        if "with_links" in results:
+            # Display formatted content with links
+            with st.container():
+                st.markdown("#### Preview with Links")
+                st.markdown(results["with_links"])
+
+            # Raw content
+            with st.expander("📝 View/Edit Raw Content with Links", expanded=False):
+                _raw_content_editor(
+                    results["with_links"],
+                    "links_edit_area",
+                    "Content with Internal Links:",
+                    help="Content with SEO-optimized internal links added"
+                )
+
+            # Download options
+            st.markdown("#### Download With Links")
+            _download_text_and_markdown(results["with_links"], f"with_links_{file_slug}")
+        else:
+            st.info("Internal linking results not available")
+
+    elif view == _RESULT_VIEWS[6]:
+        st.markdown("### Final SEO Performance Analysis")
+        st.markdown("*Comprehensive SEO assessment of the completed blog post*")
+
+        if "seo_analysis" in results:
+            _render_seo_tab(
+                results["seo_analysis"],
+                "SEO Analysis & Recommendations"
+            )
+        else:
+            st.info("SEO analysis not available")
+
+
+def _render_topic_md(topic_idea):
+    """Topic idea details as one markdown block (angle, keywords, content type, rationale)."""
+    angle, keywords, content_type, rationale = (
+        topic_idea.get(key, 'N/A') for key in ('angle', 'keywords', 'content_type', 'rationale')
+    )
+    if isinstance(keywords, list):
+        keywords = ', '.join(keywords)
+    return (
+        f"**Angle:** {angle}\n\n"
+        f"**Keywords:** {keywords}\n\n"
+        f"**Content Type:** {content_type}\n\n"
+        f"**Rationale:** {rationale}"
+    )
+
+
 def build_requirements_from_topic(topic_dict):
     """
     Convert topic metadata to requirements string for blog generation.
@@ -223,55 +776,417 @@ def build_requirements_from_topic(topic_dict):
     Returns:
         Formatted requirements string
     """
-    requirements_parts = []
+    buf = io.StringIO()
 
     if topic_dict.get('angle'):
-        requirements_parts.append(f"Angle: {topic_dict['angle']}")
+        buf.write(f"Angle: {topic_dict['angle']}\n")
 
     if topic_dict.get('keywords'):
         keywords = topic_dict['keywords']
         if isinstance(keywords, list):
             keywords = ', '.join(keywords)
-        requirements_parts.append(f"Target Keywords: {keywords}")
+        buf.write(f"Target Keywords: {keywords}\n")
 
     if topic_dict.get('content_type'):
-        requirements_parts.append(f"Content Type: {topic_dict['content_type']}")
+        buf.write(f"Content Type: {topic_dict['content_type']}\n")
 
     if topic_dict.get('rationale'):
-        requirements_parts.append(f"Rationale: {topic_dict['rationale']}")
+        buf.write(f"Rationale: {topic_dict['rationale']}\n")
+
+    # Drop the trailing line separator
+    return buf.getvalue()[:-1]
 
-    return '\n'.join(requirements_parts)
+
+def _apply_autopilot_defaults(session_state, reset_all):
+    """Write auto-pilot defaults into session state with a single update."""
+    session_state.update({
+        # Copy so sessions never share the default list objects
+        key: copy.copy(default_value)
+        for key, default_value in _AUTOPILOT_DEFAULTS.items()
+        if reset_all or key not in session_state
+    })
 
 
 def initialize_autopilot_state(session_state):
     """Initialize all auto-pilot related session state keys."""
-    defaults = {
-        'autopilot_active': False,
-        'autopilot_stop_requested': False,
-        'autopilot_total_posts': 0,
-        'autopilot_completed_posts': 0,
-        'autopilot_current_topic': None,
-        'autopilot_topics_queue': [],
-        'autopilot_results': [],
-        'autopilot_errors': [],
-        'autopilot_cached_style': None,
-    }
-    for key, default_value in defaults.items():
-        if key not in session_state:
-            session_state[key] = default_value
+    _apply_autopilot_defaults(session_state, reset_all=False)
 
 
 def reset_autopilot_state(session_state):
     """Reset auto-pilot state for a new run."""
-    session_state.autopilot_active = False
-    session_state.autopilot_stop_requested = False
-    session_state.autopilot_total_posts = 0
-    session_state.autopilot_completed_posts = 0
-    session_state.autopilot_current_topic = None
-    session_state.autopilot_topics_queue = []
-    session_state.autopilot_results = []
-    session_state.autopilot_errors = []
-    session_state.autopilot_cached_style = None
+    _apply_autopilot_defaults(session_state, reset_all=True)
+
+
+def flush_autopilot_sheets_writes(session_state, sheets_manager=None):
+    """
+    Write queued auto-pilot results to Google Sheets in a single batch.
+
+    Args:
+        session_state: Streamlit session state
+        sheets_manager: Optional SheetsManager instance
+    """
+    pending = session_state.get('autopilot_pending_writes')
+    if not pending or not sheets_manager:
+        return
+
+    sheets_manager.batch_save(pending)
+    session_state.autopilot_pending_writes = []
+    _cached_unused_topic_ideas.clear()
+    _history_and_stats.clear()
+
+
+def flush_pending_topic_marks(session_state, sheets_manager=None):
+    """
+    Mark topics picked with "Use This Topic" as used in Google Sheets in one request.
+
+    Args:
+        session_state: Streamlit session state
+        sheets_manager: Optional SheetsManager instance
+    """
+    pending = session_state.get('pending_marks')
+    if not pending or not sheets_manager:
+        return
+
+    # Written by the background writer so the click that triggered the flush isn't blocked;
+    # failures are raised to the writer, which logs them (st.warning does nothing off the script thread)
+    writes = _sheets_writer()
+    writes.put((functools.partial(sheets_manager.mark_topics_used_batch, raise_errors=True), (list(pending),)))
+    writes.put((_cached_unused_topic_ideas.clear, ()))
+    pending.clear()
+
+
+def _create_sheets_manager(service_account_json, spreadsheet_id):
+    """create_sheets_manager, importing gspread and google-auth only once Sheets is enabled."""
+    from sheets_manager import create_sheets_manager
+    return create_sheets_manager(service_account_json, spreadsheet_id)
+
+
+@st.cache_resource(max_entries=ORCHESTRATOR_CACHE_SIZE)
+def _get_orchestrator(model, brand_name, api_key, service_tier=None):
+    """
+    One orchestrator (agents and thread pool) per model, brand, API key and service tier, reused across posts.
+
+    Each entry holds a live thread pool, so only the most recent few are kept.
+    """
+    # Imported on first use so the Agents/OpenAI SDK stack isn't loaded on cold start
+    from blog_orchestrator import BlogAgentOrchestrator
+    return BlogAgentOrchestrator(model=model, brand_config=get_brand_config(brand_name), api_key=api_key,
+                                 service_tier=service_tier)
+
+
+class _NoBlogTopics(Exception):
+    """Raised out of _fetch_blog_topics so an empty or failed extraction is not cached."""
+
+
+@st.cache_data(ttl=int(BLOG_TOPICS_CACHE_TTL.total_seconds()), show_spinner=False)
+def _fetch_blog_topics(reference_blog, spreadsheet_id, _sheets_manager, _orchestrator):
+    """
+    Get a blog's existing post titles for duplicate checking.
+
+    Uses the Blog_Topics sheet while it is fresh enough and otherwise extracts the
+    titles again and writes them back. The result is memoized per URL and spreadsheet
+    for BLOG_TOPICS_CACHE_TTL, so reruns and repeat clicks skip the Sheets round trip.
+
+    Args:
+        reference_blog: Blog URL to look up
+        spreadsheet_id: ID of the connected spreadsheet (cache key only)
+        _sheets_manager: SheetsManager instance (not hashed)
+        _orchestrator: BlogAgentOrchestrator used on a cache miss (not hashed)
+
+    Returns:
+        Tuple of (existing blog post titles, when they were extracted as '%Y-%m-%d %H:%M:%S')
+
+    Raises:
+        _NoBlogTopics: If no titles could be extracted; exceptions are not cached,
+            so the next click tries again
+    """
+    cached = _sheets_manager.get_cached_blog_topics(reference_blog)
+    if cached:
+        try:
+            # Written as '%Y-%m-%d %H:%M:%S', which fromisoformat parses without strptime's regex machinery
+            last_updated = datetime.fromisoformat(cached['last_updated'])
+            if datetime.now() - last_updated < BLOG_TOPICS_MAX_AGE - BLOG_TOPICS_CACHE_TTL:
+                return cached['topics'], cached['last_updated']
+        except (KeyError, TypeError, ValueError):
+            pass  # Invalid timestamp, extract fresh
+
+    # extract_blog_topics returns [] on any failure, which must not stick for a week
+    existing_topics = _orchestrator.extract_blog_topics(reference_blog)
+    if not existing_topics:
+        raise _NoBlogTopics(reference_blog)
+    _sheets_manager.save_blog_topics(reference_blog, existing_topics)
+    return existing_topics, datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+
+@dataclass(frozen=True)
+class _BrandView:
+    """Brand values pre-formatted for the topic generator form."""
+    default_keywords: str
+    product_options: Tuple[str, ...]
+    product_by_name: Dict[str, ProductInfo]
+
+
+@st.cache_resource
+def _brand_view(brand_name):
+    """Build the topic generator's keyword default and product dropdown once per brand."""
+    brand = get_brand_config(brand_name)
+    return _BrandView(
+        default_keywords=", ".join(brand.primary_keywords[:5]),
+        product_options=("None - No specific product",) + tuple(p.name for p in brand.key_products),
+        product_by_name={p.name: p for p in brand.key_products}
+    )
+
+
+@st.cache_data(max_entries=128, show_spinner=False)
+def _domain_seed_keyword(url):
+    """First label of a blog URL's domain (without www.), used as a trending-keyword seed."""
+    domain_match = _DOMAIN_RE.search(url)
+    return domain_match.group(1).split('.')[0] if domain_match else None
+
+
+class _NoTrendingQueries(Exception):
+    """Raised out of _trending_for_domain so an empty or rate-limited lookup is not cached."""
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def _trending_for_domain(domain, _researcher):
+    """Related Google Trends queries for a domain seed keyword, memoized for an hour when found."""
+    # get_related_queries returns [] on any failure (including 429s), which must not stick for an hour
+    queries = _researcher.get_related_queries(domain)
+    if not queries:
+        raise _NoTrendingQueries(domain)
+    return queries
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def _enrich_topics(topics, has_google_ads, _researcher):
+    """
+    Enrich topics with keyword data, memoized on the topics themselves.
+
+    has_google_ads is part of the cache key because it changes which fields are filled in.
+    """
+    return _researcher.enrich_topics_with_keyword_data(topics)
+
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def _render_html_export(md, title):
+    """Build the standalone HTML export (pulldown-cmark via pyromark) once per post body and title."""
+    body = pyromark.html(
+        md,
+        options=pyromark.Options.ENABLE_TABLES | pyromark.Options.ENABLE_STRIKETHROUGH | pyromark.Options.ENABLE_TASKLISTS
+    )
+    return _HTML_TEMPLATE.format(title=html.escape(title), body=body)
+
+
+@st.cache_resource
+def _sheets_writer():
+    """Queue of (function, args) Google Sheets writes applied in order by a daemon thread."""
+    writes = queue.Queue()
+
+    def worker():
+        while True:
+            fn, args = writes.get()
+            try:
+                fn(*args)
+            except Exception:
+                logger.exception("Background Google Sheets write failed")
+            finally:
+                writes.task_done()
+
+    threading.Thread(target=worker, name="sheets-writer", daemon=True).start()
+    return writes
+
+
+@st.cache_resource
+def _get_autopilot_executor():
+    """
+    Shared worker pool that generates auto-pilot posts off the Streamlit script thread.
+
+    The pool is process-wide, so one session's posts can wait behind another's; a job's
+    progress dict is marked 'started' once a worker picks it up.
+    """
+    return ThreadPoolExecutor(max_workers=AUTOPILOT_MAX_WORKERS, thread_name_prefix="autopilot-")
+
+
+def _generate_autopilot_post(api_key, model, brand_config, topic_title, reference_blog, requirements,
+                             cached_style, product_target, progress, service_tier=None):
+    """
+    Generate one auto-pilot post on a worker thread.
+
+    Worker threads cannot draw Streamlit widgets, so status updates are written
+    into the shared progress dict and rendered by the script on its next poll.
+    """
+    def update_progress(message, percent):
+        progress['message'] = message
+        progress['percent'] = percent
+
+    progress['started'] = True
+    orchestrator = _get_orchestrator(model, brand_config.name, api_key, service_tier)
+    return orchestrator.create_blog_post(
+        topic=topic_title,
+        reference_blog=reference_blog,
+        requirements=requirements,
+        status_callback=update_progress,
+        cached_style_guide=cached_style,
+        product_target=product_target,
+        specific_pages=None
+    )
+
+
+@st.cache_data(show_spinner=False)
+def _brand_css(primary_color):
+    """Build the brand color <style> block once per color."""
+    return f"""
+        <style>
+            .stApp {{ --primary-color: {primary_color}; }}
+            div[data-testid="stSidebarHeader"] {{ border-bottom: 3px solid {primary_color}; }}
+        </style>
+        """
+
+
+@st.fragment(run_every=AUTOPILOT_POLL_SECONDS)
+def _autopilot_progress():
+    """
+    Auto-pilot progress panel, refreshed on its own timer while posts are generating.
+
+    Only this fragment reruns on each poll. Once a worker finishes (or none are left)
+    it triggers a full rerun so the main script records the result and queues more work.
+    """
+    jobs = st.session_state.autopilot_jobs
+    if not jobs or any(job['future'].done() for job in jobs):
+        st.rerun()
+
+    st.markdown("---")
+    st.markdown("### 🔄 Auto-Pilot Progress")
+
+    # Overall progress bar
+    progress_pct = st.session_state.autopilot_completed_posts / st.session_state.autopilot_total_posts
+    st.progress(progress_pct)
+    st.markdown(f"**{st.session_state.autopilot_completed_posts}/{st.session_state.autopilot_total_posts}** posts completed")
+
+    # Topics being processed by the workers, or still waiting for one
+    for job in jobs:
+        title = job['topic_dict'].get('title', 'Untitled Topic')
+        if job['progress'].get('started'):
+            st.info(f"🔄 Currently processing: **{title}**")
+            st.progress(job['progress']['percent'])
+            st.text(f"🔄 {job['progress']['message']}")
+        else:
+            st.info(f"⏳ Queued: **{title}** (waiting for a free worker)")
+
+    # Completed posts list
+    if st.session_state.autopilot_results:
+        with st.expander(f"✅ Completed posts ({len(st.session_state.autopilot_results)})", expanded=False):
+            # One markdown element for the whole list; this panel re-renders on every poll
+            st.markdown("\n\n".join(
+                f"{'✅' if result.get('success') else '❌'} **{i+1}.** {result.get('topic', 'Unknown')}"
+                for i, result in enumerate(st.session_state.autopilot_results)
+            ))
+
+    # Error list
+    if st.session_state.autopilot_errors:
+        with st.expander(f"❌ Errors ({len(st.session_state.autopilot_errors)})", expanded=True):
+            for error in st.session_state.autopilot_errors:
+                st.error(f"**{error.get('topic', 'Unknown')}**: {error.get('error', 'Unknown error')}")
+
+
+@st.fragment
+def _render_content_history(sheets_manager):
+    """Content history and blog source stats; its buttons only rerun this fragment."""
+    st.header("📋 Content History")
+
+    try:
+        history, source_stats = _history_and_stats(
+            sheets_manager.current_brand, sheets_manager.spreadsheet_id, sheets_manager
+        )
+        if history:
+            for item in history:
+                with st.expander(f"📝 {item['Topic']} ({item['Date_Created']})"):
+                    st.markdown(
+                        f"**Source Blog:** {item['Source_Blog']} · "
+                        f"**Word Count:** {item['Word_Count']} · "
+                        f"**SEO Score:** {item['SEO_Score'] if item['SEO_Score'] else 'N/A'}"
+                    )
+
+                    if st.button(f"📄 View Content", key=f"view_{item['ID']}"):
+                        st.markdown("### Generated Content")
+                        st.markdown(item['Final_Content'])
+        else:
+            st.info("No content history found")
+
+        # Blog source statistics
+        st.subheader("📊 Blog Source Performance")
+        if source_stats:
+            for source in source_stats[:5]:  # Show top 5
+                st.write(f"**{source['Domain']}** - Success: {source['Success_Count']}, Last used: {source['Last_Analyzed']}")
+        else:
+            st.info("No blog source statistics available")
+    except Exception as e:
+        st.error(f"❌ Could not load content history: {str(e)}")
+
+
+@st.fragment
+def _render_autopilot_results():
+    """Per-post auto-pilot results; downloads and view switches inside only rerun this fragment."""
+    st.markdown("---")
+    st.header("🚀 Auto-Pilot Results")
+
+    # Summary metrics
+    total_results = len(st.session_state.autopilot_results)
+    successful = sum(1 for r in st.session_state.autopilot_results if r.get('success'))
+    failed = total_results - successful
+
+    col_metric1, col_metric2, col_metric3 = st.columns(3)
+    with col_metric1:
+        st.metric("Total Generated", total_results)
+    with col_metric2:
+        st.metric("Successful", successful, delta=None)
+    with col_metric3:
+        st.metric("Failed", failed, delta=None, delta_color="inverse" if failed > 0 else "off")
+
+    # Expandable results for each post
+    for i, result in enumerate(st.session_state.autopilot_results):
+        topic_name = result.get('topic', f'Post {i+1}')
+        status_icon = "✅" if result.get('success') else "❌"
+
+        with st.expander(f"{status_icon} {topic_name}", expanded=False):
+            if result.get('success') and 'results' in result:
+                post_results = result['results']
+
+                # Only the selected view of this post's content is rendered
+                ap_view = st.radio(
+                    "View", _AUTOPILOT_RESULT_VIEWS, horizontal=True, key=f"ap_view_{i}", label_visibility="collapsed"
+                )
+
+                if ap_view == _AUTOPILOT_RESULT_VIEWS[0]:
+                    if 'final' in post_results:
+                        st.markdown(post_results['final'])
+
+                        # Download buttons
+                        ap_slug = topic_name[:30].replace(' ', '_').lower()
+                        _download_text_and_markdown(post_results['final'], f"autopilot_{ap_slug}", key_prefix=f"ap_dl_{i}")
+                    else:
+                        st.info("Final content not available")
+
+                elif ap_view == _AUTOPILOT_RESULT_VIEWS[1]:
+                    if 'style_guide' in post_results:
+                        _render_read_only_text(post_results['style_guide'], "Style Guide", height=300)
+                    else:
+                        st.info("Style guide not available")
+
+                elif ap_view == _AUTOPILOT_RESULT_VIEWS[2]:
+                    if 'seo_analysis' in post_results:
+                        _render_seo_tab(post_results['seo_analysis'], "SEO Analysis", height=300)
+                    else:
+                        st.info("SEO analysis not available")
+            else:
+                st.error(f"Error: {result.get('error', 'Unknown error')}")
+
+    # Clear results button
+    if st.button("🗑️ Clear Auto-Pilot Results", help="Remove all auto-pilot results from this session"):
+        st.session_state.autopilot_results = []
+        st.session_state.autopilot_errors = []
+        st.rerun()
 
 
 def main():
@@ -282,36 +1197,38 @@ def main():
         layout="wide"
     )
 
+    # Bound once; main() reads session state many times per rerun
+    ss = st.session_state
+
     # Initialize auto-pilot session state
-    initialize_autopilot_state(st.session_state)
+    initialize_autopilot_state(ss)
 
     # Initialize sheets_manager at function level
     sheets_manager = None
 
     # Get API key from environment (simplified for dedicated system)
-    api_key = os.environ.get("OPENAI_API_KEY", "")
+    api_key = _env_config().openai_api_key
 
     # Header with brand-aware styling
     _, col_center, _ = st.columns([1, 2, 1])
     with col_center:
-        st.markdown('<h1 style="text-align: center; margin-top: 1rem;">✍️ Safety Products Global</h1>', unsafe_allow_html=True)
-        st.markdown('<p style="text-align: center; font-size: 1.1rem; margin-bottom: 2rem;"><strong>Multi-Brand Blog Content Generator</strong></p>', unsafe_allow_html=True)
+        st.markdown(_HEADER_HTML, unsafe_allow_html=True)
     
     # Sidebar for configuration
     with st.sidebar:
         # Brand Selection (TOP PRIORITY)
         st.header("🏢 Brand Selection")
-        brands = get_all_brands()
+        brand_by_name = {b.name: b for b in get_all_brands()}
         selected_brand_name = st.selectbox(
             "Select Brand",
-            options=[b.name for b in brands],
-            format_func=lambda x: get_brand_config(x).display_name,
+            options=list(brand_by_name),
+            format_func=lambda x: brand_by_name[x].display_name,
             help="Choose which brand you're creating content for"
         )
-        brand_config = get_brand_config(selected_brand_name)
+        brand_config = brand_by_name[selected_brand_name]
 
         # Store brand in session state
-        st.session_state.current_brand = selected_brand_name
+        ss.current_brand = selected_brand_name
 
         # Display brand info
         st.markdown(f"**Domain:** {brand_config.primary_domain}")
@@ -321,12 +1238,7 @@ def main():
             st.info(f"No blog yet - using {brand_config.style_source_url} for style")
 
         # Apply brand-specific color styling
-        st.markdown(f"""
-        <style>
-            .stApp {{ --primary-color: {brand_config.primary_color}; }}
-            div[data-testid="stSidebarHeader"] {{ border-bottom: 3px solid {brand_config.primary_color}; }}
-        </style>
-        """, unsafe_allow_html=True)
+        st.markdown(_brand_css(brand_config.primary_color), unsafe_allow_html=True)
 
         st.markdown("---")
         st.header("⚙️ Configuration")
@@ -378,16 +1290,16 @@ def main():
                 spreadsheet_id = env_spreadsheet_id
 
                 # Auto-connect if not already connected
-                if 'sheets_manager' not in st.session_state:
+                if 'sheets_manager' not in ss:
                     try:
-                        sheets_manager = create_sheets_manager(service_account_json, spreadsheet_id)
+                        sheets_manager = _create_sheets_manager(service_account_json, spreadsheet_id)
                         if sheets_manager:
-                            st.session_state.sheets_manager = sheets_manager
+                            ss.sheets_manager = sheets_manager
                     except Exception as e:
                         st.error(f"❌ Connection failed: {str(e)}")
 
-                if 'sheets_manager' in st.session_state:
-                    sheets_manager = st.session_state.sheets_manager
+                if 'sheets_manager' in ss:
+                    sheets_manager = ss.sheets_manager
                     st.info("📊 Connected to Google Sheets")
             else:
                 # Manual input fallback
@@ -407,27 +1319,32 @@ def main():
                 if service_account_json and spreadsheet_id:
                     if st.button("🔗 Test Sheets Connection"):
                         try:
-                            sheets_manager = create_sheets_manager(service_account_json, spreadsheet_id)
+                            sheets_manager = _create_sheets_manager(service_account_json, spreadsheet_id)
                             if sheets_manager:
                                 st.success("✅ Connected to Google Sheets!")
-                                st.session_state.sheets_manager = sheets_manager
+                                ss.sheets_manager = sheets_manager
                             else:
                                 st.error("❌ Failed to connect to Google Sheets")
                         except Exception as e:
                             st.error(f"❌ Connection failed: {str(e)}")
 
-                    if 'sheets_manager' in st.session_state:
-                        sheets_manager = st.session_state.sheets_manager
+                    if 'sheets_manager' in ss:
+                        sheets_manager = ss.sheets_manager
                         try:
-                            if sheets_manager.test_connection():
+                            # Re-probe a cached connection at most once per SHEETS_RECHECK_SECONDS
+                            now = time.monotonic()
+                            if now - ss.get('sheets_last_check', float('-inf')) < SHEETS_RECHECK_SECONDS:
+                                st.info("📊 Using cached Sheets connection")
+                            elif sheets_manager.test_connection():
+                                ss.sheets_last_check = now
                                 st.info("📊 Using cached Sheets connection")
                             else:
                                 st.warning("⚠️ Cached connection invalid, please reconnect")
-                                del st.session_state.sheets_manager
+                                del ss.sheets_manager
                                 sheets_manager = None
                         except Exception as e:
                             st.warning(f"⚠️ Connection issue: {str(e)}")
-                            del st.session_state.sheets_manager
+                            del ss.sheets_manager
                             sheets_manager = None
                 else:
                     st.warning("⚠️ Please provide Service Account JSON and Spreadsheet ID")
@@ -480,21 +1397,23 @@ def main():
                             keyword_researcher = create_keyword_researcher(config)
                             if keyword_researcher and keyword_researcher.google_ads_client:
                                 st.success("✅ Connected to Google Ads API!")
-                                st.session_state.keyword_researcher = keyword_researcher
+                                ss.keyword_researcher = keyword_researcher
                             else:
                                 st.error("❌ Failed to connect - check credentials")
                         except Exception as e:
                             st.error(f"❌ Connection failed: {str(e)}")
 
                     # Use cached connection
-                    if 'keyword_researcher' in st.session_state:
-                        keyword_researcher = st.session_state.keyword_researcher
+                    if 'keyword_researcher' in ss:
+                        keyword_researcher = ss.keyword_researcher
                         st.info("🔍 Using cached Google Ads connection")
                 else:
                     st.info("💡 [Setup Guide](https://developers.google.com/google-ads/api/docs/first-call/overview)")
         else:
-            # Always create researcher for Google Trends (free)
-            keyword_researcher = create_keyword_researcher()
+            # Always use a researcher for Google Trends (free), built once per session
+            if 'trends_researcher' not in ss:
+                ss.trends_researcher = create_keyword_researcher()
+            keyword_researcher = ss.trends_researcher
 
         st.markdown("---")
 
@@ -540,186 +1459,186 @@ def main():
     # AUTO-PILOT EXECUTION LOOP
     # ============================================================
     # Ensure sheets_manager is retrieved from session state for auto-pilot
-    if 'sheets_manager' in st.session_state and sheets_manager is None:
-        sheets_manager = st.session_state.sheets_manager
-
-    if st.session_state.autopilot_active:
-        # Check for stop request
-        if st.session_state.autopilot_stop_requested:
-            st.session_state.autopilot_active = False
-            st.session_state.autopilot_stop_requested = False
-            st.success("⏹️ Auto-pilot stopped by user request")
-        # Check if we need to auto-generate topics first
-        elif st.session_state.get('autopilot_needs_topics', False):
-            with st.spinner("💡 Auto-generating topics for auto-pilot..."):
-                with temporary_env_var("OPENAI_API_KEY", api_key):
-                    orchestrator = BlogAgentOrchestrator(model=model, brand_config=brand_config)
-
-                    # Generate topics using the topic generator
-                    topics = orchestrator.generate_topic_ideas(
-                        reference_blog,
-                        preferences="",
-                        status_callback=None,
-                        trending_keywords=None,
-                        product_target=None,
-                        existing_topics=None
-                    )
+    if 'sheets_manager' in ss and sheets_manager is None:
+        sheets_manager = ss.sheets_manager
+
+    if ss.autopilot_active:
+        # Collect posts finished by the background workers
+        running_jobs = []
+        for job in ss.autopilot_jobs:
+            if not job['future'].done():
+                running_jobs.append(job)
+                continue
+
+            current_topic_dict = job['topic_dict']
+            topic_title = current_topic_dict.get('title', 'Untitled Topic')
 
-                    if topics:
-                        # Queue the generated topics
-                        st.session_state.autopilot_topics_queue = topics[:st.session_state.autopilot_total_posts]
-                        st.session_state.generated_topics = topics  # Also store for display
-                        st.session_state.autopilot_needs_topics = False
-                        st.success(f"✅ Generated {len(topics)} topics for auto-pilot")
-                        st.rerun()
-                    else:
-                        st.error("❌ Failed to generate topics. Please generate topics manually first.")
-                        st.session_state.autopilot_active = False
-                        st.session_state.autopilot_needs_topics = False
+            try:
+                results = job['future'].result()
+            except Exception as e:
+                results = {'error': str(e)}
 
-        # Check if all posts are completed
-        elif st.session_state.autopilot_completed_posts >= st.session_state.autopilot_total_posts:
-            st.session_state.autopilot_active = False
-            st.balloons()
-            st.success(f"🎉 Auto-pilot completed! Generated {st.session_state.autopilot_completed_posts} posts.")
+            # Cache the style guide for subsequent posts
+            if not ss.autopilot_cached_style and 'style_guide' in results:
+                ss.autopilot_cached_style = results['style_guide']
 
-        # Check if there are topics in the queue to process
-        elif st.session_state.autopilot_topics_queue:
-            # Get next topic from queue
-            current_topic_dict = st.session_state.autopilot_topics_queue.pop(0)
-            topic_title = current_topic_dict.get('title', 'Untitled Topic')
-            st.session_state.autopilot_current_topic = topic_title
+            # Process results
+            if 'error' in results:
+                # Record error
+                ss.autopilot_errors.append({
+                    'topic': topic_title,
+                    'error': results['error']
+                })
+                ss.autopilot_results.append({
+                    'topic': topic_title,
+                    'success': False,
+                    'error': results['error']
+                })
+            else:
+                # Record success
+                ss.autopilot_results.append({
+                    'topic': topic_title,
+                    'success': True,
+                    'results': results
+                })
 
-            # Build requirements from topic metadata
-            topic_requirements = build_requirements_from_topic(current_topic_dict)
+                # Save to Google Sheets if enabled
+                if sheets_manager:
+                    try:
+                        # Set the current brand context
+                        sheets_manager.set_current_brand(selected_brand_name)
 
-            # Get product target if available
-            autopilot_product_target = st.session_state.get('topic_gen_product_target', '')
+                        # Save style guide if this post analyzed it
+                        if job['analyzes_style'] and 'style_guide' in results:
+                            sheets_manager.save_style_guide(reference_blog, results['style_guide'])
+                            _cached_style_guide.clear()
 
-            # Create progress display
-            post_num = st.session_state.autopilot_completed_posts + 1
-            total_posts = st.session_state.autopilot_total_posts
+                        # Queue content, source stats and topic usage for a batched write
+                        ss.autopilot_pending_writes.append({
+                            'topic': topic_title,
+                            'source_blog': reference_blog,
+                            'content_data': results,
+                            'topic_id': current_topic_dict.get('ID'),
+                            'created_at': datetime.now()
+                        })
+                        if len(ss.autopilot_pending_writes) >= AUTOPILOT_SHEETS_BATCH_SIZE:
+                            flush_autopilot_sheets_writes(ss, sheets_manager)
+                    except Exception as e:
+                        st.warning(f"⚠️ Could not save to Sheets: {e}")
+                else:
+                    st.info("ℹ️ Google Sheets not connected - results not saved")
 
-            progress_container = st.container()
-            with progress_container:
-                st.markdown(f"### 🔄 Auto-Pilot: Post {post_num}/{total_posts}")
-                st.markdown(f"**Topic:** {topic_title}")
-                progress_bar = st.progress(0)
-                status_text = st.empty()
+                # Mark topic as used in session state
+                current_topic_dict['used'] = True
 
-                def update_autopilot_status(message, progress):
-                    status_text.text(f"🔄 Post {post_num}/{total_posts}: {message}")
-                    progress_bar.progress(progress)
+            # Update completion count
+            ss.autopilot_completed_posts += 1
 
-            try:
-                with temporary_env_var("OPENAI_API_KEY", api_key):
-                    orchestrator = BlogAgentOrchestrator(model=model, brand_config=brand_config)
+        ss.autopilot_jobs = running_jobs
 
-                    # Use cached style guide if available, otherwise analyze once and cache
-                    cached_style = st.session_state.autopilot_cached_style
+        # Check for stop request (posts already running are allowed to finish)
+        if ss.autopilot_stop_requested:
+            if not running_jobs:
+                ss.autopilot_active = False
+                ss.autopilot_stop_requested = False
+                st.success("⏹️ Auto-pilot stopped by user request")
+        # Check if we need to auto-generate topics first
+        elif ss.get('autopilot_needs_topics', False):
+            with st.spinner("💡 Auto-generating topics for auto-pilot..."):
+                orchestrator = _get_orchestrator(model, brand_config.name, api_key)
+
+                # Generate topics using the topic generator
+                topics = orchestrator.generate_topic_ideas(
+                    reference_blog,
+                    preferences="",
+                    status_callback=None,
+                    trending_keywords=None,
+                    product_target=None,
+                    existing_topics=None
+                )
 
-                    # Check for style guide from sheets if not cached yet
-                    if not cached_style and sheets_manager:
-                        try:
-                            sheets_cached = sheets_manager.get_cached_style_guide(reference_blog)
-                            if sheets_cached:
-                                cached_style = sheets_cached['style_guide']
-                                st.session_state.autopilot_cached_style = cached_style
-                        except Exception:
-                            pass
-
-                    # Generate the blog post
-                    results = orchestrator.create_blog_post(
-                        topic=topic_title,
-                        reference_blog=reference_blog,
-                        requirements=topic_requirements,
-                        status_callback=update_autopilot_status,
-                        cached_style_guide=cached_style,
-                        product_target=autopilot_product_target if autopilot_product_target else None,
-                        specific_pages=None
-                    )
+                if topics:
+                    # Queue the generated topics
+                    ss.autopilot_topics_queue = topics[:ss.autopilot_total_posts]
+                    ss.generated_topics = topics  # Also store for display
+                    ss.autopilot_needs_topics = False
+                    st.success(f"✅ Generated {len(topics)} topics for auto-pilot")
+                    st.rerun()
+                else:
+                    st.error("❌ Failed to generate topics. Please generate topics manually first.")
+                    ss.autopilot_active = False
+                    ss.autopilot_needs_topics = False
 
-                    # Cache the style guide for subsequent posts
-                    if not st.session_state.autopilot_cached_style and 'style_guide' in results:
-                        st.session_state.autopilot_cached_style = results['style_guide']
+        # Check if all posts are completed
+        elif ss.autopilot_completed_posts >= ss.autopilot_total_posts:
+            ss.autopilot_active = False
+            st.balloons()
+            st.success(f"🎉 Auto-pilot completed! Generated {ss.autopilot_completed_posts} posts.")
 
-                    # Process results
-                    if 'error' in results:
-                        # Record error
-                        st.session_state.autopilot_errors.append({
-                            'topic': topic_title,
-                            'error': results['error']
-                        })
-                        st.session_state.autopilot_results.append({
-                            'topic': topic_title,
-                            'success': False,
-                            'error': results['error']
-                        })
-                    else:
-                        # Record success
-                        st.session_state.autopilot_results.append({
-                            'topic': topic_title,
-                            'success': True,
-                            'results': results
-                        })
+        # Check if there are topics queued or still being generated
+        elif ss.autopilot_topics_queue or running_jobs:
+            # Use cached style guide if available, otherwise analyze once and cache
+            cached_style = ss.autopilot_cached_style
 
-                        # Save to Google Sheets if enabled
-                        if sheets_manager:
-                            try:
-                                # Set the current brand context
-                                sheets_manager.set_current_brand(selected_brand_name)
-
-                                # Save style guide if this is the first post
-                                if post_num == 1 and 'style_guide' in results:
-                                    sheets_manager.save_style_guide(reference_blog, results['style_guide'])
-
-                                # Save generated content
-                                sheets_manager.save_generated_content(
-                                    topic_title,
-                                    reference_blog,
-                                    results
-                                )
-
-                                # Update blog source stats
-                                sheets_manager.update_blog_source_stats(reference_blog, success=True)
-
-                                # Mark topic as used
-                                if 'ID' in current_topic_dict:
-                                    sheets_manager.mark_topic_used(current_topic_dict['ID'])
-                            except Exception as e:
-                                st.warning(f"⚠️ Could not save to Sheets: {e}")
-                        else:
-                            st.info("ℹ️ Google Sheets not connected - results not saved")
-
-                        # Mark topic as used in session state
-                        current_topic_dict['used'] = True
-
-                    # Update completion count
-                    st.session_state.autopilot_completed_posts += 1
-                    st.session_state.autopilot_current_topic = None
+            # Check for style guide from sheets once per run (a miss is remembered too)
+            if not cached_style and sheets_manager and not ss.autopilot_style_lookup_attempted:
+                ss.autopilot_style_lookup_attempted = True
+                try:
+                    sheets_cached = _cached_style_guide(
+                        reference_blog, sheets_manager.current_brand, sheets_manager.spreadsheet_id, sheets_manager
+                    )
+                    if sheets_cached:
+                        cached_style = sheets_cached['style_guide']
+                        ss.autopilot_cached_style = cached_style
+                except Exception as e:
+                    logger.warning("Could not look up cached style guide for auto-pilot: %s", e)
 
-            except Exception as e:
-                # Record error
-                st.session_state.autopilot_errors.append({
-                    'topic': topic_title,
-                    'error': str(e)
-                })
-                st.session_state.autopilot_results.append({
-                    'topic': topic_title,
-                    'success': False,
-                    'error': str(e)
+            # Get product target if available
+            autopilot_product_target = ss.get('topic_gen_product_target', '')
+
+            # Hand queued topics to the worker pool, at most max_running per session (the pool is
+            # shared, so a submitted post may still wait for a worker). Until a style guide is
+            # cached only one post is submitted, so the style analysis happens once per run.
+            max_running = AUTOPILOT_MAX_WORKERS if cached_style else 1
+            while ss.autopilot_topics_queue and len(running_jobs) < max_running:
+                current_topic_dict = ss.autopilot_topics_queue.pop(0)
+                progress = {'message': '⏳ Starting...', 'percent': 0, 'started': False}
+                future = _get_autopilot_executor().submit(
+                    _generate_autopilot_post,
+                    api_key,
+                    model,
+                    brand_config,
+                    current_topic_dict.get('title', 'Untitled Topic'),
+                    reference_blog,
+                    build_requirements_from_topic(current_topic_dict),
+                    cached_style,
+                    autopilot_product_target if autopilot_product_target else None,
+                    progress,
+                    ss.autopilot_service_tier
+                )
+                running_jobs.append({
+                    'future': future,
+                    'topic_dict': current_topic_dict,
+                    'progress': progress,
+                    'analyzes_style': not cached_style
                 })
-                st.session_state.autopilot_completed_posts += 1
-                st.session_state.autopilot_current_topic = None
 
-            # Trigger next iteration
-            st.rerun()
+            ss.autopilot_jobs = running_jobs
 
         else:
             # No more topics in queue
-            st.session_state.autopilot_active = False
+            ss.autopilot_active = False
             st.warning("⚠️ Auto-pilot stopped: No more topics in queue")
 
+        ss.autopilot_current_topic = ", ".join(
+            job['topic_dict'].get('title', 'Untitled Topic') for job in ss.autopilot_jobs
+        ) or None
+
+    # Write any queued auto-pilot results (and topic marks) once the run has finished or stopped
+    if not ss.autopilot_active and ss.autopilot_pending_writes:
+        flush_autopilot_sheets_writes(ss, sheets_manager)
+        flush_pending_topic_marks(ss, sheets_manager)
+
     # ============================================================
     # MAIN CONTENT AREA
     # ============================================================
@@ -751,7 +1670,8 @@ def main():
         st.subheader("💡 Topic Idea Generator")
 
         # Pre-populated keywords from brand config
-        default_keywords = ", ".join(brand_config.primary_keywords[:5]) if brand_config.primary_keywords else ""
+        brand_view = _brand_view(brand_config.name)
+        default_keywords = brand_view.default_keywords
         target_keywords = st.text_input(
             "🎯 Target Keywords",
             value=default_keywords,
@@ -761,14 +1681,13 @@ def main():
         # Product/page target - dropdown from brand's key products or custom input
         st.markdown("**🛍️ Product/Page Target**")
         if brand_config.key_products:
-            product_options = ["None - No specific product"] + [p.name for p in brand_config.key_products]
-            selected_product_idx = st.selectbox(
+            product_options = brand_view.product_options
+            selected_product_name = st.selectbox(
                 "Select a product to promote",
-                options=range(len(product_options)),
-                format_func=lambda i: product_options[i]
+                options=product_options
             )
-            if selected_product_idx > 0:
-                selected_product = brand_config.key_products[selected_product_idx - 1]
+            if selected_product_name != product_options[0]:
+                selected_product = brand_view.product_by_name[selected_product_name]
                 product_target = f"Product: {selected_product.name}\nURL: {selected_product.url}\nDescription: {selected_product.description}"
                 st.info(f"Promoting: {selected_product.name}")
             else:
@@ -792,119 +1711,122 @@ def main():
                 st.error("⚠️ Please set OPENAI_API_KEY in your .env file")
             else:
                 with st.spinner(f"Generating topic ideas for {brand_config.display_name}..."):
-                    with temporary_env_var("OPENAI_API_KEY", api_key):
-                        orchestrator = BlogAgentOrchestrator(model=model, brand_config=brand_config)
+                    orchestrator = _get_orchestrator(model, brand_config.name, api_key)
 
-                        # Generate topics
-                        progress_bar = st.progress(0)
-                        status_text = st.empty()
+                    # Generate topics
+                    progress_bar = st.progress(0)
+                    status_text = st.empty()
 
-                        def update_status(message, progress):
-                            status_text.text(message)
-                            progress_bar.progress(progress)
+                    def update_status(message, progress):
+                        status_text.text(message)
+                        progress_bar.progress(progress)
 
-                        # Get or extract existing blog topics for duplication checking
-                        existing_topics = []
-                        if sheets_manager:
-                            try:
-                                status_text.text("📚 Checking for cached blog topics...")
-                                cached = sheets_manager.get_cached_blog_topics(reference_blog)
-
-                                if cached:
-                                    # Check if cache is fresh (< 7 days)
-                                    from datetime import datetime, timedelta
-                                    try:
-                                        last_updated = datetime.strptime(cached['last_updated'], '%Y-%m-%d %H:%M:%S')
-                                        if datetime.now() - last_updated < timedelta(days=7):
-                                            existing_topics = cached['topics']
-                                            st.info(f"📚 Using cached topics ({len(existing_topics)} titles)")
-                                        else:
-                                            # Cache is stale, extract fresh topics
-                                            status_text.text("📰 Extracting fresh blog topics...")
-                                            existing_topics = orchestrator.extract_blog_topics(reference_blog)
-                                            if existing_topics:
-                                                sheets_manager.save_blog_topics(reference_blog, existing_topics)
-                                    except:
-                                        # Invalid timestamp, extract fresh
-                                        status_text.text("📰 Extracting blog topics...")
-                                        existing_topics = orchestrator.extract_blog_topics(reference_blog)
-                                        if existing_topics:
-                                            sheets_manager.save_blog_topics(reference_blog, existing_topics)
-                                else:
-                                    # No cache, extract for first time
-                                    status_text.text("📰 Extracting blog topics...")
-                                    existing_topics = orchestrator.extract_blog_topics(reference_blog)
-                                    if existing_topics:
-                                        sheets_manager.save_blog_topics(reference_blog, existing_topics)
-                            except Exception as e:
-                                st.warning(f"⚠️ Could not extract blog topics: {str(e)}")
-
-                        # Combine user keywords with trending keywords
-                        all_keywords = []
-
-                        # Add user-provided target keywords (highest priority)
-                        if target_keywords.strip():
-                            user_keywords = [kw.strip() for kw in target_keywords.split(',') if kw.strip()]
-                            all_keywords.extend(user_keywords)
-
-                        # Fetch trending keywords to supplement user keywords
-                        if keyword_researcher:
-                            try:
-                                status_text.text("🔍 Fetching trending keywords...")
-                                # Extract a seed keyword from the reference blog domain
-                                import re
-                                domain_match = re.search(r'https?://(?:www\.)?([^/]+)', reference_blog)
-                                if domain_match:
-                                    domain = domain_match.group(1).split('.')[0]
-                                    trending_keywords = keyword_researcher.get_related_queries(domain)
-                                    # Add trending keywords (avoid duplicates)
-                                    for kw in trending_keywords:
-                                        if kw.lower() not in [k.lower() for k in all_keywords]:
-                                            all_keywords.append(kw)
-                            except Exception as e:
-                                st.warning(f"⚠️ Could not fetch trending keywords: {str(e)}")
-
-                        # Generate topics informed by all keywords, product target, and existing topics
-                        topics = orchestrator.generate_topic_ideas(
-                            reference_blog,
-                            preferences="",
-                            status_callback=update_status,
-                            trending_keywords=all_keywords if all_keywords else None,
-                            product_target=product_target.strip() if product_target.strip() else None,
-                            existing_topics=existing_topics if existing_topics else None
-                        )
+                    # Get or extract existing blog topics for duplication checking
+                    existing_topics = []
+                    if sheets_manager:
+                        try:
+                            status_text.text("📚 Loading existing blog topics...")
+                            existing_topics, topics_updated = _fetch_blog_topics(
+                                reference_blog, sheets_manager.spreadsheet_id, sheets_manager, orchestrator
+                            )
+                            st.info(f"📚 Checking against {len(existing_topics)} existing titles (last updated: {topics_updated})")
+                        except _NoBlogTopics:
+                            pass  # Nothing to check against this time
+                        except Exception as e:
+                            st.warning(f"⚠️ Could not extract blog topics: {str(e)}")
+
+                    # Combine user keywords with trending keywords (case-insensitive dedupe)
+                    all_keywords = []
+                    seen_keywords = set()
+
+                    def add_keywords(keywords):
+                        for kw in keywords:
+                            kw_lower = kw.lower()
+                            if kw_lower not in seen_keywords:
+                                seen_keywords.add(kw_lower)
+                                all_keywords.append(kw)
 
-                        # Enrich with detailed keyword data
-                        if keyword_researcher and topics:
-                            status_text.text("🔍 Enriching with keyword research data...")
-                            topics = keyword_researcher.enrich_topics_with_keyword_data(topics)
+                    # Add user-provided target keywords (highest priority)
+                    if target_keywords.strip():
+                        add_keywords(kw for raw in target_keywords.split(',') if (kw := raw.strip()))
 
-                        # Store in session state
-                        st.session_state.generated_topics = topics
-                        st.session_state.topic_gen_product_target = product_target.strip() if product_target.strip() else ""
-                        status_text.empty()
-                        progress_bar.empty()
+                    # Fetch trending keywords to supplement user keywords
+                    if keyword_researcher:
+                        try:
+                            status_text.text("🔍 Fetching trending keywords...")
+                            domain = _domain_seed_keyword(reference_blog)
+                            if domain:
+                                add_keywords(_trending_for_domain(domain, keyword_researcher))
+                        except _NoTrendingQueries:
+                            pass  # No trending keywords this time
+                        except Exception as e:
+                            st.warning(f"⚠️ Could not fetch trending keywords: {str(e)}")
+
+                    # Generate topics informed by all keywords, product target, and existing topics
+                    topics = orchestrator.generate_topic_ideas(
+                        reference_blog,
+                        preferences="",
+                        status_callback=update_status,
+                        trending_keywords=all_keywords if all_keywords else None,
+                        product_target=product_target.strip() if product_target.strip() else None,
+                        existing_topics=existing_topics if existing_topics else None
+                    )
 
-                        # Save to Google Sheets if enabled
-                        if sheets_manager and topics:
-                            try:
-                                status_text.text("💾 Saving topics to Google Sheets...")
-                                sheets_manager.save_topic_ideas(reference_blog, topics)
-                                st.success("✅ Topics saved to Google Sheets!")
-                            except Exception as e:
-                                st.warning(f"⚠️ Could not save topics to Sheets: {str(e)}")
+                    # Enrich with detailed keyword data (skipped when every topic already has it)
+                    if keyword_researcher and topics and not all('search_volume' in t for t in topics):
+                        status_text.text("🔍 Enriching with keyword research data...")
+                        topics = _enrich_topics(
+                            topics, keyword_researcher.google_ads_client is not None, keyword_researcher
+                        )
+
+                    # Store in session state
+                    ss.generated_topics = topics
+                    ss.topic_gen_product_target = product_target.strip() if product_target.strip() else ""
+                    status_text.empty()
+                    progress_bar.empty()
+
+                    # Save to Google Sheets if enabled
+                    if sheets_manager and topics:
+                        try:
+                            status_text.text("💾 Saving topics to Google Sheets...")
+                            sheets_manager.save_topic_ideas(reference_blog, topics)
+                            _cached_unused_topic_ideas.clear()
+                            st.success("✅ Topics saved to Google Sheets!")
+                        except Exception as e:
+                            st.warning(f"⚠️ Could not save topics to Sheets: {str(e)}")
 
 
         # Display generated topics
-        if 'generated_topics' in st.session_state and st.session_state.generated_topics:
-            st.success(f"✅ Generated {len(st.session_state.generated_topics)} topic ideas!")
+        if 'generated_topics' in ss and ss.generated_topics:
+            st.success(f"✅ Generated {len(ss.generated_topics)} topic ideas!")
+
+            # One selectable table instead of an expander and button per topic
+            topic_rows = [
+                {
+                    'Title': topic_idea['title'],
+                    'Content Type': topic_idea.get('content_type', 'N/A'),
+                    'Search Volume': str(topic_idea.get('search_volume', 'N/A')),
+                    'Competition': str(topic_idea.get('competition', 'N/A')),
+                    'Trend': topic_idea.get('trend_status', 'N/A')
+                }
+                for topic_idea in ss.generated_topics
+            ]
+            topic_selection = st.dataframe(
+                topic_rows,
+                hide_index=True,
+                use_container_width=True,
+                on_select="rerun",
+                selection_mode="single-row",
+                key="generated_topics_table"
+            )
 
-            for i, topic_idea in enumerate(st.session_state.generated_topics):
-                with st.expander(f"💡 {topic_idea['title']}", expanded=False):
-                    st.write(f"**Angle:** {topic_idea.get('angle', 'N/A')}")
-                    st.write(f"**Keywords:** {', '.join(topic_idea.get('keywords', []))}")
-                    st.write(f"**Content Type:** {topic_idea.get('content_type', 'N/A')}")
-                    st.write(f"**Rationale:** {topic_idea.get('rationale', 'N/A')}")
+            # Details and actions only for the selected topic
+            selected_rows = topic_selection.selection.rows
+            if selected_rows and selected_rows[0] < len(ss.generated_topics):
+                topic_idea = ss.generated_topics[selected_rows[0]]
+                with st.container(border=True):
+                    st.markdown(f"**💡 {topic_idea['title']}**")
+                    st.markdown(_render_topic_md(topic_idea))
 
                     # Show keyword data if available
                     if 'search_volume' in topic_idea:
@@ -916,28 +1838,24 @@ def main():
                         with col_c:
                             st.metric("Trend", topic_idea.get('trend_status', 'N/A'))
 
-                    if st.button(f"✏️ Use This Topic", key=f"use_topic_{i}"):
+                    if st.button(f"✏️ Use This Topic", key="use_topic"):
                         # Set the topic_input widget directly
-                        st.session_state.topic_input = topic_idea['title']
+                        ss.topic_input = topic_idea['title']
 
                         # Pre-fill requirements with topic context
                         requirements_text = f"""Angle: {topic_idea.get('angle', 'N/A')}
 Target Keywords: {', '.join(topic_idea.get('keywords', []))}
 Content Type: {topic_idea.get('content_type', 'N/A')}
 Rationale: {topic_idea.get('rationale', 'N/A')}"""
-                        st.session_state.requirements_input = requirements_text
+                        ss.requirements_input = requirements_text
 
                         # Transfer product target from topic generator to blog generator
-                        if 'topic_gen_product_target' in st.session_state:
-                            st.session_state.blog_product_target = st.session_state.topic_gen_product_target
+                        if 'topic_gen_product_target' in ss:
+                            ss.blog_product_target = ss.topic_gen_product_target
 
-                        # Mark topic as used in Google Sheets if enabled
+                        # Queue the topic to be marked as used in Google Sheets on the next write
                         if sheets_manager and 'ID' in topic_idea:
-                            try:
-                                sheets_manager.mark_topic_used(topic_idea['ID'])
-                                st.success(f"✅ Topic marked as used in Google Sheets!")
-                            except Exception as e:
-                                st.warning(f"⚠️ Could not mark topic as used: {str(e)}")
+                            ss.setdefault('pending_marks', []).append(topic_idea['ID'])
 
                         st.rerun()
 
@@ -948,7 +1866,7 @@ Rationale: {topic_idea.get('rationale', 'N/A')}"""
         st.caption("Generate multiple blog posts automatically without intervention")
 
         # Get available topics for preview
-        available_topics = get_available_topics_for_autopilot(st.session_state, sheets_manager)
+        available_topics = get_available_topics_for_autopilot(ss, sheets_manager)
         topics_available_count = len(available_topics)
 
         # Show topic availability status
@@ -970,16 +1888,25 @@ Rationale: {topic_idea.get('rationale', 'N/A')}"""
         # Topics preview expander
         if topics_available_count > 0:
             with st.expander(f"📋 Preview queued topics ({min(num_posts, topics_available_count)} of {topics_available_count})"):
-                for i, topic_item in enumerate(available_topics[:num_posts]):
-                    st.markdown(f"**{i+1}.** {topic_item.get('title', 'Untitled')}")
-                    if topic_item.get('angle'):
-                        st.caption(f"   Angle: {topic_item['angle']}")
+                # One markdown element for the whole preview instead of two per topic
+                st.markdown("\n\n".join(
+                    f"**{i+1}.** {topic_item.get('title', 'Untitled')}"
+                    + (f"  \n:gray[Angle: {topic_item['angle']}]" if topic_item.get('angle') else "")
+                    for i, topic_item in enumerate(available_topics[:num_posts])
+                ))
+
+        use_flex = st.checkbox(
+            "💸 Use flex processing (cheaper, slower)",
+            value=False,
+            help="Runs auto-pilot posts on OpenAI's flex tier at roughly half the token price, "
+                 "with longer and less predictable response times. Supported on GPT-5 and o-series models."
+        )
 
         # Auto-pilot control buttons
         col_start, col_stop = st.columns(2)
 
         with col_start:
-            start_disabled = st.session_state.autopilot_active
+            start_disabled = ss.autopilot_active
             if st.button(
                 "▶️ Start Auto-Pilot",
                 type="primary",
@@ -987,454 +1914,184 @@ Rationale: {topic_idea.get('rationale', 'N/A')}"""
                 help="Start generating blog posts automatically"
             ):
                 # Initialize auto-pilot
-                if topics_available_count == 0:
-                    # Need to auto-generate topics first
-                    st.session_state.autopilot_needs_topics = True
-                else:
-                    # Queue up topics
-                    st.session_state.autopilot_topics_queue = available_topics[:num_posts].copy()
-
-                st.session_state.autopilot_active = True
-                st.session_state.autopilot_stop_requested = False
-                st.session_state.autopilot_total_posts = num_posts
-                st.session_state.autopilot_completed_posts = 0
-                st.session_state.autopilot_results = []
-                st.session_state.autopilot_errors = []
-                st.session_state.autopilot_cached_style = None
+                flush_pending_topic_marks(ss, sheets_manager)
+                # Queue up topics, or auto-generate them first if none are available
+                ss.update({
+                    'autopilot_topics_queue': available_topics[:num_posts],
+                    'autopilot_needs_topics': topics_available_count == 0,
+                    'autopilot_active': True,
+                    'autopilot_stop_requested': False,
+                    'autopilot_total_posts': num_posts,
+                    'autopilot_completed_posts': 0,
+                    'autopilot_results': [],
+                    'autopilot_errors': [],
+                    'autopilot_cached_style': None,
+                    'autopilot_style_lookup_attempted': False,
+                    'autopilot_service_tier': 'flex' if use_flex else None
+                })
                 st.rerun()
 
         with col_stop:
-            stop_disabled = not st.session_state.autopilot_active
+            stop_disabled = not ss.autopilot_active
             if st.button(
                 "⏹️ Stop Auto-Pilot",
                 disabled=stop_disabled,
                 help="Stop after current post completes"
             ):
-                st.session_state.autopilot_stop_requested = True
+                ss.autopilot_stop_requested = True
                 st.warning("⏹️ Stop requested - will stop after current post completes")
 
         # Show auto-pilot progress when active
-        if st.session_state.autopilot_active:
-            st.markdown("---")
-            st.markdown("### 🔄 Auto-Pilot Progress")
-
-            # Overall progress bar
-            progress_pct = st.session_state.autopilot_completed_posts / st.session_state.autopilot_total_posts
-            st.progress(progress_pct)
-            st.markdown(f"**{st.session_state.autopilot_completed_posts}/{st.session_state.autopilot_total_posts}** posts completed")
-
-            # Current topic being processed
-            if st.session_state.autopilot_current_topic:
-                st.info(f"🔄 Currently processing: **{st.session_state.autopilot_current_topic}**")
-
-            # Completed posts list
-            if st.session_state.autopilot_results:
-                with st.expander(f"✅ Completed posts ({len(st.session_state.autopilot_results)})", expanded=False):
-                    for i, result in enumerate(st.session_state.autopilot_results):
-                        status_icon = "✅" if result.get('success') else "❌"
-                        st.markdown(f"{status_icon} **{i+1}.** {result.get('topic', 'Unknown')}")
-
-            # Error list
-            if st.session_state.autopilot_errors:
-                with st.expander(f"❌ Errors ({len(st.session_state.autopilot_errors)})", expanded=True):
-                    for error in st.session_state.autopilot_errors:
-                        st.error(f"**{error.get('topic', 'Unknown')}**: {error.get('error', 'Unknown error')}")
+        if ss.autopilot_active:
+            _autopilot_progress()
 
         st.markdown("---")
 
-        # Topic input
-        topic = st.text_area(
-            "Blog Topic",
-            height=100,
-            max_chars=MAX_TOPIC_LENGTH,
-            placeholder=f"Enter your blog topic (max {MAX_TOPIC_LENGTH} characters)",
-            help="The main subject for your blog post",
-            key="topic_input"
-        )
-        
-        # Requirements input
-        requirements = st.text_area(
-            "Additional Requirements",
-            height=150,
-            max_chars=MAX_REQUIREMENTS_LENGTH,
-            placeholder=f"""- Target audience: [your audience]
+        # Post inputs are batched in a form so typing doesn't rerun the whole app
+        with st.form("blog_post_form", border=False):
+            # Topic input
+            topic = st.text_area(
+                "Blog Topic",
+                height=100,
+                max_chars=MAX_TOPIC_LENGTH,
+                placeholder=f"Enter your blog topic (max {MAX_TOPIC_LENGTH} characters)",
+                help="The main subject for your blog post",
+                key="topic_input"
+            )
+
+            # Requirements input
+            requirements = st.text_area(
+                "Additional Requirements",
+                height=150,
+                max_chars=MAX_REQUIREMENTS_LENGTH,
+                placeholder=f"""- Target audience: [your audience]
 - Include practical examples
 - Keep under [word count] words
 - Add call-to-action
 - Focus on [specific aspect]
 
 (max {MAX_REQUIREMENTS_LENGTH} characters)""",
-            help="Specific requirements for your blog post",
-            key="requirements_input"
-        )
+                help="Specific requirements for your blog post",
+                key="requirements_input"
+            )
 
-        # Product/Page target for blog generation
-        blog_product_target = st.text_area(
-            "🛍️ Product/Page Target (Optional)",
-            placeholder="e.g., Page URL: https://mystore.com/products/product\nDescription: Brief description of what the page offers and its key benefits...",
-            height=100,
-            help="Enter a product page, landing page, or service page URL and/or description. The blog post will naturally promote this page.",
-            key="blog_product_target"
-        )
+            # Product/Page target for blog generation
+            blog_product_target = st.text_area(
+                "🛍️ Product/Page Target (Optional)",
+                placeholder="e.g., Page URL: https://mystore.com/products/product\nDescription: Brief description of what the page offers and its key benefits...",
+                height=100,
+                help="Enter a product page, landing page, or service page URL and/or description. The blog post will naturally promote this page.",
+                key="blog_product_target"
+            )
 
-        # Generate button
-        generate_button = st.button(
-            "🚀 Generate Blog Post",
-            type="primary",
-            disabled=not (api_key and topic.strip() and reference_blog.strip())
-        )
+            # Generate button (the form only reruns the app when it is submitted)
+            generate_button = st.form_submit_button(
+                "🚀 Generate Blog Post",
+                type="primary",
+                disabled=not (api_key and reference_blog.strip())
+            )
     
     with col2:
         st.header("📊 Output")
         
         if generate_button:
+            flush_pending_topic_marks(ss, sheets_manager)
+
             # Server-side validation
-            if not topic.strip():
-                st.error("❌ Please enter a topic for your blog post")
+            input_error = _post_input_error(topic, requirements, api_key, reference_blog)
+            if input_error:
+                st.error(f"❌ {input_error}")
                 return
 
-            if not reference_blog.strip():
-                st.error("❌ Please enter a reference blog URL for style matching")
-                return
+            try:
+                # Initialize orchestrator with selected model and brand config
+                orchestrator = _get_orchestrator(model, brand_config.name, api_key)
 
-            if len(topic.strip()) > MAX_TOPIC_LENGTH:
-                st.error(f"❌ Topic too long. Maximum {MAX_TOPIC_LENGTH} characters allowed.")
-                return
+                # Progress tracking (one element carries both the bar and the status message)
+                progress_bar = st.progress(0)
 
-            if len(requirements) > MAX_REQUIREMENTS_LENGTH:
-                st.error(f"❌ Requirements too long. Maximum {MAX_REQUIREMENTS_LENGTH} characters allowed.")
-                return
+                # Callback function to update status
+                def update_status(message, progress):
+                    progress_bar.progress(progress, text=message)
 
-            if len(api_key) > MAX_API_KEY_LENGTH:
-                st.error("❌ Invalid API key format.")
-                return
+                # Show each agent's output as soon as it finishes instead of waiting for the whole run
+                stage_preview = st.empty()
 
-            try:
-                # Use secure context manager for API key
-                with temporary_env_var("OPENAI_API_KEY", api_key):
-                    # Initialize orchestrator with selected model and brand config
-                    orchestrator = BlogAgentOrchestrator(model=model, brand_config=brand_config)
+                def show_stage(stage, output):
+                    with stage_preview.container():
+                        with st.expander(f"Latest output: {_STAGE_LABELS.get(stage, stage)}", expanded=stage in ("draft", "final")):
+                            st.markdown(output)
 
-                    # Progress tracking
-                    progress_bar = st.progress(0)
-                    status_text = st.empty()
+                # Parse specific reference pages
+                specific_pages_list = None
+                if reference_pages.strip():
+                    # Split by lines (handles pasted \r\n) and filter empty lines, stripping each once
+                    specific_pages_list = [page for line in reference_pages.splitlines() if (page := line.strip())]
 
-                    # Callback function to update status
-                    def update_status(message, progress):
-                        status_text.text(message)
-                        progress_bar.progress(progress)
+                # Check for cached style guide if sheets enabled
+                cached_style = None
+                if sheets_manager:
+                    try:
+                        update_status("🔍 Checking for cached style guide...", 5)
+                        cached_style = _cached_style_guide(
+                            reference_blog, sheets_manager.current_brand, sheets_manager.spreadsheet_id, sheets_manager
+                        )
+                        if cached_style:
+                            st.info(f"📋 Using cached style guide for {reference_blog} (last updated: {cached_style['last_updated']})")
+                    except Exception as e:
+                        st.warning(f"⚠️ Could not access cached style guide: {str(e)}")
+                        cached_style = None
+
+                # Generate blog post with real-time updates
+                results = orchestrator.create_blog_post(
+                    status_callback=update_status,
+                    stage_callback=show_stage,
+                    topic=topic,
+                    reference_blog=reference_blog,
+                    requirements=requirements,
+                    cached_style_guide=cached_style['style_guide'] if cached_style else None,
+                    product_target=blog_product_target.strip() if blog_product_target.strip() else None,
+                    specific_pages=specific_pages_list
+                )
 
-                    # Parse specific reference pages
-                    specific_pages_list = None
-                    if reference_pages.strip():
-                        # Split by newlines and filter empty lines
-                        specific_pages_list = [page.strip() for page in reference_pages.split('\n') if page.strip()]
+                stage_preview.empty()
 
-                    # Check for cached style guide if sheets enabled
-                    cached_style = None
-                    if sheets_manager:
-                        try:
-                            update_status("🔍 Checking for cached style guide...", 5)
-                            cached_style = sheets_manager.get_cached_style_guide(reference_blog)
-                            if cached_style:
-                                st.info(f"📋 Using cached style guide for {reference_blog} (last updated: {cached_style['last_updated']})")
-                        except Exception as e:
-                            st.warning(f"⚠️ Could not access cached style guide: {str(e)}")
-                            cached_style = None
-
-                    # Generate blog post with real-time updates
-                    results = orchestrator.create_blog_post(
-                        topic=topic,
-                        reference_blog=reference_blog,
-                        requirements=requirements,
-                        status_callback=update_status,
-                        cached_style_guide=cached_style['style_guide'] if cached_style else None,
-                        product_target=blog_product_target.strip() if blog_product_target.strip() else None,
-                        specific_pages=specific_pages_list
-                    )
+                # Save results to sheets if enabled
+                if sheets_manager and "error" not in results:
+                    try:
+                        update_status("💾 Saving to Google Sheets...", 95)
 
-                    # Save results to sheets if enabled
-                    if sheets_manager and "error" not in results:
-                        try:
-                            update_status("💾 Saving to Google Sheets...", 95)
-
-                            # Save style guide if it was freshly generated
-                            if not cached_style and "style_guide" in results:
-                                sheets_manager.save_style_guide(
-                                    reference_blog,
-                                    results["style_guide"]
-                                )
-
-                            # Save generated content
-                            sheets_manager.save_generated_content(
-                                topic,
+                        # Save style guide if it was freshly generated
+                        if not cached_style and "style_guide" in results:
+                            sheets_manager.save_style_guide(
                                 reference_blog,
-                                results
+                                results["style_guide"]
                             )
+                            _cached_style_guide.clear()
 
-                            # Update blog source stats
-                            sheets_manager.update_blog_source_stats(reference_blog, success=True)
+                        # Save generated content
+                        sheets_manager.save_generated_content(
+                            topic,
+                            reference_blog,
+                            results
+                        )
 
-                            st.success("✅ Content saved to Google Sheets!")
-                        except Exception as e:
-                            st.warning(f"⚠️ Could not save to Google Sheets: {str(e)}")
-                            # Continue without failing the entire operation
+                        # Update blog source stats
+                        sheets_manager.update_blog_source_stats(reference_blog, success=True)
+                        _history_and_stats.clear()
+
+                        st.success("✅ Content saved to Google Sheets!")
+                    except Exception as e:
+                        st.warning(f"⚠️ Could not save to Google Sheets: {str(e)}")
+                        # Continue without failing the entire operation
                 
                 # Display results
                 if "error" in results:
                     st.error(f"❌ Error: {results['error']}")
                 else:
-                    # Tabs for different outputs
-                    tab1, tab2, tab3, tab4, tab5, tab6, tab7 = st.tabs([
-                        "📄 Final Post",
-                        "🎨 Style Guide",
-                        "🔍 Research & Analysis", 
-                        "✍️ Writer Draft",
-                        "📊 Initial SEO Analysis",
-                        "🔗 With Links",
-                        "📊 Final SEO Analysis"
-                    ])
-                    
-                    with tab1:
-                        st.markdown("### Final Blog Post")
-                        
-                        # Display formatted content
-                        with st.container():
-                            st.markdown("#### Preview")
-                            # Show formatted markdown preview
-                            st.markdown(results["final"])
-                        
-                        # Raw content for editing
-                        with st.expander("📝 Edit Raw Content", expanded=False):
-                            edited_content = st.text_area(
-                                "Edit the blog post content:",
-                                value=results["final"],
-                                height=400,
-                                help="You can edit the content here before downloading",
-                                key="final_edit_area"
-                            )
-                        
-                        # Default to original content for downloads
-                        final_content = edited_content if st.session_state.get("final_edit_area") else results["final"]
-                        
-                        # Download options
-                        st.markdown("#### Download Options")
-                        col1, col2, col3 = st.columns(3)
-                        
-                        with col1:
-                            st.download_button(
-                                label="📄 Download as Text",
-                                data=final_content,
-                                file_name=f"blog_post_{topic[:30].replace(' ', '_').lower()}.txt",
-                                mime="text/plain",
-                                use_container_width=True
-                            )
-                        
-                        with col2:
-                            st.download_button(
-                                label="📝 Download as Markdown", 
-                                data=final_content,
-                                file_name=f"blog_post_{topic[:30].replace(' ', '_').lower()}.md",
-                                mime="text/markdown",
-                                use_container_width=True
-                            )
-                        
-                        with col3:
-                            # Convert markdown to HTML for download
-                            try:
-                                import markdown
-                                html_content = f"""<!DOCTYPE html>
-<html>
-<head>
-    <meta charset="UTF-8">
-    <title>{topic}</title>
-    <style>
-        body {{ font-family: Arial, sans-serif; max-width: 800px; margin: 0 auto; padding: 20px; line-height: 1.6; }}
-        h1, h2, h3 {{ color: #333; }}
-        code {{ background-color: #f4f4f4; padding: 2px 4px; border-radius: 3px; }}
-        pre {{ background-color: #f4f4f4; padding: 10px; border-radius: 5px; overflow-x: auto; }}
-        blockquote {{ border-left: 4px solid #ddd; margin: 0; padding-left: 20px; font-style: italic; }}
-        a {{ color: #0066cc; text-decoration: none; }}
-        a:hover {{ text-decoration: underline; }}
-    </style>
-</head>
-<body>
-{markdown.markdown(final_content)}
-</body>
-</html>"""
-                                st.download_button(
-                                    label="🌐 Download as HTML",
-                                    data=html_content,
-                                    file_name=f"blog_post_{topic[:30].replace(' ', '_').lower()}.html",
-                                    mime="text/html",
-                                    use_container_width=True
-                                )
-                            except ImportError:
-                                st.info("HTML export requires markdown package")
-                    
-                    with tab2:
-                        st.markdown("### Extracted Style Guide")
-                        st.markdown(f"*Style analysis from: {reference_blog}*")
-                        st.text_area(
-                            "Style Guide",
-                            value=results["style_guide"],
-                            height=400,
-                            disabled=False,
-                            help="You can copy text from this field"
-                        )
-                    
-                    with tab3:
-                        st.markdown("### Research & Analysis")
-                        st.markdown("*Comprehensive research on the topic*")
-                        if "research" in results:
-                            st.text_area(
-                                "Research Results",
-                                value=results["research"],
-                                height=400,
-                                disabled=False,
-                                key="research_area",
-                                help="Detailed research findings and insights"
-                            )
-                        else:
-                            st.info("Research results not available")
-                    
-                    with tab4:
-                        st.markdown("### Writer Draft")
-                        st.markdown("*Initial blog post draft before SEO optimization*")
-                        if "draft" in results:
-                            # Display formatted content
-                            with st.container():
-                                st.markdown("#### Preview")
-                                st.markdown(results["draft"])
-                            
-                            # Raw content for editing
-                            with st.expander("📝 Edit Draft Content", expanded=False):
-                                st.text_area(
-                                    "Edit the draft content:",
-                                    value=results["draft"],
-                                    height=400,
-                                    key="draft_edit_area",
-                                    help="You can edit the draft content here before downloading"
-                                )
-                            
-                            # Download options for draft
-                            st.markdown("#### Download Draft")
-                            col1, col2 = st.columns(2)
-                            
-                            with col1:
-                                st.download_button(
-                                    label="📄 Download Draft as Text",
-                                    data=results["draft"],
-                                    file_name=f"draft_{topic[:30].replace(' ', '_').lower()}.txt",
-                                    mime="text/plain",
-                                    use_container_width=True
-                                )
-                            
-                            with col2:
-                                st.download_button(
-                                    label="📝 Download Draft as Markdown",
-                                    data=results["draft"],
-                                    file_name=f"draft_{topic[:30].replace(' ', '_').lower()}.md",
-                                    mime="text/markdown",
-                                    use_container_width=True
-                                )
-                        else:
-                            st.info("Writer draft not available")
-                    
-                    with tab5:
-                        st.markdown("### Initial SEO Analysis")
-                        st.markdown("*SEO optimization recommendations for the draft*")
-                        if "initial_seo_analysis" in results:
-                            st.text_area(
-                                "SEO Optimization Recommendations",
-                                value=results["initial_seo_analysis"],
-                                height=400,
-                                disabled=False,
-                                key="initial_seo_area",
-                                help="SEO recommendations applied during editing"
-                            )
-                        else:
-                            st.info("Initial SEO analysis not available")
-                    
-                    with tab6:
-                        st.markdown("### Content With Internal Links")
-                        st.markdown("*Blog post with strategic SEO-optimized internal links*")
-                        if "with_links" in results:
-                            # Display formatted content with links
-                            with st.container():
-                                st.markdown("#### Preview with Links")
-                                st.markdown(results["with_links"])
-                            
-                            # Raw content
-                            with st.expander("📝 View/Edit Raw Content with Links", expanded=False):
-                                st.text_area(
-                                    "Content with Internal Links:",
-                                    value=results["with_links"],
-                                    height=400,
-                                    key="links_edit_area",
-                                    help="Content with SEO-optimized internal links added"
-                                )
-                            
-                            # Download options
-                            st.markdown("#### Download With Links")
-                            col1, col2 = st.columns(2)
-                            
-                            with col1:
-                                st.download_button(
-                                    label="📄 Download as Text",
-                                    data=results["with_links"],
-                                    file_name=f"with_links_{topic[:30].replace(' ', '_').lower()}.txt",
-                                    mime="text/plain",
-                                    use_container_width=True
-                                )
-                            
-                            with col2:
-                                st.download_button(
-                                    label="📝 Download as Markdown",
-                                    data=results["with_links"],
-                                    file_name=f"with_links_{topic[:30].replace(' ', '_').lower()}.md",
-                                    mime="text/markdown",
-                                    use_container_width=True
-                                )
-                        else:
-                            st.info("Internal linking results not available")
-                    
-                    with tab7:
-                        st.markdown("### Final SEO Performance Analysis")
-                        st.markdown("*Comprehensive SEO assessment of the completed blog post*")
-                        
-                        if "seo_analysis" in results:
-                            # Parse SEO score if available
-                            seo_text = results["seo_analysis"]
-                            if "SEO SCORE:" in seo_text:
-                                try:
-                                    score_line = [line for line in seo_text.split('\n') if 'SEO SCORE:' in line][0]
-                                    score = score_line.split(':')[1].strip().split('/')[0]
-                                    score_num = int(score)
-                                    
-                                    # Color-coded score display
-                                    if score_num >= 80:
-                                        st.success(f"🎯 **SEO Score: {score}/100** - Excellent!")
-                                    elif score_num >= 60:
-                                        st.warning(f"⚠️ **SEO Score: {score}/100** - Good with room for improvement")
-                                    else:
-                                        st.error(f"🔴 **SEO Score: {score}/100** - Needs optimization")
-                                except:
-                                    pass
-                            
-                            st.text_area(
-                                "SEO Analysis & Recommendations",
-                                value=results["seo_analysis"],
-                                height=450,
-                                disabled=False,
-                                key="seo_area",
-                                help="You can copy text from this field"
-                            )
-                        else:
-                            st.info("SEO analysis not available")
-                        
+                    _render_post_results(results, topic, reference_blog)
+
             except Exception as e:
-                import traceback
                 error_traceback = traceback.format_exc()
 
                 st.error(f"❌ An error occurred: {str(e)}")
@@ -1446,139 +2103,15 @@ Rationale: {topic_idea.get('rationale', 'N/A')}"""
 
     # Show content history if sheets enabled
     if sheets_manager and st.checkbox("📋 Show Content History", value=False):
-        st.header("📋 Content History")
-
-        try:
-            history = sheets_manager.get_content_history(limit=10)
-            if history:
-                for item in history:
-                    with st.expander(f"📝 {item['Topic']} ({item['Date_Created']})"):
-                        col1, col2, col3 = st.columns(3)
-                        with col1:
-                            st.metric("Source Blog", item['Source_Blog'])
-                        with col2:
-                            st.metric("Word Count", item['Word_Count'])
-                        with col3:
-                            st.metric("SEO Score", item['SEO_Score'] if item['SEO_Score'] else 'N/A')
-
-                        if st.button(f"📄 View Content", key=f"view_{item['ID']}"):
-                            st.markdown("### Generated Content")
-                            st.markdown(item['Final_Content'])
-            else:
-                st.info("No content history found")
-
-            # Blog source statistics
-            st.subheader("📊 Blog Source Performance")
-            source_stats = sheets_manager.get_blog_source_stats()
-            if source_stats:
-                for source in source_stats[:5]:  # Show top 5
-                    st.write(f"**{source['Domain']}** - Success: {source['Success_Count']}, Last used: {source['Last_Analyzed']}")
-            else:
-                st.info("No blog source statistics available")
-        except Exception as e:
-            st.error(f"❌ Could not load content history: {str(e)}")
+        _render_content_history(sheets_manager)
 
     # Auto-Pilot Results Section
-    if st.session_state.autopilot_results:
-        st.markdown("---")
-        st.header("🚀 Auto-Pilot Results")
-
-        # Summary metrics
-        total_results = len(st.session_state.autopilot_results)
-        successful = sum(1 for r in st.session_state.autopilot_results if r.get('success'))
-        failed = total_results - successful
-
-        col_metric1, col_metric2, col_metric3 = st.columns(3)
-        with col_metric1:
-            st.metric("Total Generated", total_results)
-        with col_metric2:
-            st.metric("Successful", successful, delta=None)
-        with col_metric3:
-            st.metric("Failed", failed, delta=None, delta_color="inverse" if failed > 0 else "off")
-
-        # Expandable results for each post
-        for i, result in enumerate(st.session_state.autopilot_results):
-            topic_name = result.get('topic', f'Post {i+1}')
-            status_icon = "✅" if result.get('success') else "❌"
-
-            with st.expander(f"{status_icon} {topic_name}", expanded=False):
-                if result.get('success') and 'results' in result:
-                    post_results = result['results']
-
-                    # Show tabs for this post's content
-                    ap_tab1, ap_tab2, ap_tab3 = st.tabs(["📄 Final Post", "🎨 Style Guide", "📊 SEO Analysis"])
-
-                    with ap_tab1:
-                        if 'final' in post_results:
-                            st.markdown(post_results['final'])
-
-                            # Download buttons
-                            dl_col1, dl_col2 = st.columns(2)
-                            with dl_col1:
-                                st.download_button(
-                                    label="📄 Download as Text",
-                                    data=post_results['final'],
-                                    file_name=f"autopilot_{topic_name[:30].replace(' ', '_').lower()}.txt",
-                                    mime="text/plain",
-                                    key=f"ap_dl_txt_{i}",
-                                    use_container_width=True
-                                )
-                            with dl_col2:
-                                st.download_button(
-                                    label="📝 Download as Markdown",
-                                    data=post_results['final'],
-                                    file_name=f"autopilot_{topic_name[:30].replace(' ', '_').lower()}.md",
-                                    mime="text/markdown",
-                                    key=f"ap_dl_md_{i}",
-                                    use_container_width=True
-                                )
-                        else:
-                            st.info("Final content not available")
-
-                    with ap_tab2:
-                        if 'style_guide' in post_results:
-                            st.text_area(
-                                "Style Guide",
-                                value=post_results['style_guide'],
-                                height=300,
-                                disabled=False,
-                                key=f"ap_style_{i}"
-                            )
-                        else:
-                            st.info("Style guide not available")
-
-                    with ap_tab3:
-                        if 'seo_analysis' in post_results:
-                            st.text_area(
-                                "SEO Analysis",
-                                value=post_results['seo_analysis'],
-                                height=300,
-                                disabled=False,
-                                key=f"ap_seo_{i}"
-                            )
-                        else:
-                            st.info("SEO analysis not available")
-                else:
-                    st.error(f"Error: {result.get('error', 'Unknown error')}")
-
-        # Clear results button
-        if st.button("🗑️ Clear Auto-Pilot Results", help="Remove all auto-pilot results from this session"):
-            st.session_state.autopilot_results = []
-            st.session_state.autopilot_errors = []
-            st.rerun()
+    if ss.autopilot_results:
+        _render_autopilot_results()
 
     # Footer
     st.markdown("---")
-    st.markdown(
-        f"""
-        <div style='text-align: center; color: gray; padding: 2rem 0;'>
-        <p><strong>Safety Products Global</strong> - Multi-Brand Content Generation</p>
-        <p style='font-size: 0.9rem; margin-top: 0.5rem;'>Slice | Klever Innovations | Pacific Handy Cutter</p>
-        <p style='font-size: 0.8rem; margin-top: 0.5rem;'>Powered by OpenAI Agents SDK | Built by Bertram Labs</p>
-        </div>
-        """,
-        unsafe_allow_html=True
-    )
+    st.markdown(_FOOTER_HTML, unsafe_allow_html=True)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,29 +1,52 @@
 #!/usr/bin/env python3
 import asyncio
+import random
+import re
 import threading
+import time
 from typing import Dict, List, Optional, TYPE_CHECKING
 from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from dotenv import load_dotenv
-from agents import Agent, Runner, WebSearchTool
+from agents import Agent, ModelSettings, OpenAIProvider, RunConfig, Runner, WebSearchTool
+from openai import RateLimitError
+
+try:
+    import uvloop
+except ImportError:  # Windows, or not installed
+    uvloop = None
 
 if TYPE_CHECKING:
     from brand_config import BrandConfig
 
 load_dotenv()
 
+# Retries for an agent run rejected with HTTP 429, with jittered exponential backoff. The
+# OpenAI client already retries each request twice with short delays, and a retry here
+# re-runs the whole agent conversation, so this is one longer pause on top of those
+RATE_LIMIT_RETRIES = 1
+RATE_LIMIT_BACKOFF_SECONDS = 15
+
+# Numbered topic heading in the topic generator output, e.g. "## 1. Title Here" or "1. Title Here"
+_TOPIC_TITLE_RE = re.compile(r'^#{0,2}\s*\d+\.\s*(.+)$')
+
 
 class BlogAgentOrchestrator:
-    def __init__(self, model: str = "gpt-5", brand_config: Optional["BrandConfig"] = None):
+    def __init__(self, model: str = "gpt-5", brand_config: Optional["BrandConfig"] = None, api_key: Optional[str] = None,
+                 service_tier: Optional[str] = None):
         """
         Initialize the blog orchestrator.
 
         Args:
             model: OpenAI model to use for all agents
             brand_config: Optional brand configuration for brand-aware generation
+            api_key: Optional OpenAI API key; falls back to OPENAI_API_KEY when omitted
+            service_tier: Optional OpenAI service tier for every request (e.g. "flex" for cheaper, slower runs)
         """
         # Store the model for all agents
         self.model = model
         self.brand_config = brand_config
+        self._api_key = api_key
+        self._service_tier = service_tier
 
         # Thread pool for agent execution (prevents resource leaks)
         self._thread_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="agent-")
@@ -319,17 +342,28 @@ class BlogAgentOrchestrator:
             )
         }
     
+    def _run_config(self) -> Optional[RunConfig]:
+        """Build a per-run config that carries the API key and service tier without touching os.environ."""
+        config = {}
+        if self._api_key:
+            config["model_provider"] = OpenAIProvider(api_key=self._api_key)
+        if self._service_tier:
+            config["model_settings"] = ModelSettings(extra_args={"service_tier": self._service_tier})
+        return RunConfig(**config) if config else None
+
     def _run_agent_safely(self, agent, prompt, timeout_seconds=300):
         """Execute agent in isolated thread to prevent Streamlit async conflicts."""
-        
+        started = threading.Event()
+
         def run_in_thread():
             """Run agent with its own event loop in separate thread."""
+            started.set()
             loop = None
             try:
-                # Create new event loop for this thread
-                loop = asyncio.new_event_loop()
+                # Create new event loop for this thread (uvloop's is faster when available)
+                loop = uvloop.new_event_loop() if uvloop else asyncio.new_event_loop()
                 asyncio.set_event_loop(loop)
-                result = Runner.run_sync(agent, prompt)
+                result = Runner.run_sync(agent, prompt, run_config=self._run_config())
                 return {"success": True, "result": result}
             except Exception as e:
                 return {"success": False, "error": e}
@@ -342,12 +376,31 @@ class BlogAgentOrchestrator:
                         pass  # Ignore cleanup errors
         
         # Use ThreadPoolExecutor for proper resource management
-        try:
+        for attempt in range(RATE_LIMIT_RETRIES + 1):
+            started.clear()
             future = self._thread_pool.submit(run_in_thread)
-            data = future.result(timeout=timeout_seconds)
-        except FutureTimeoutError:
-            raise TimeoutError(f"Agent '{agent.name}' execution timed out after {timeout_seconds} seconds")
-        
+            # The pool is shared by every caller of this orchestrator, so the run timeout
+            # starts once the agent is running; waiting for a free thread is bounded separately
+            # (a job that starts just as the wait runs out can no longer be cancelled, so it is awaited)
+            if not started.wait(timeout_seconds) and future.cancel():
+                raise TimeoutError(
+                    f"Agent '{agent.name}' did not start within {timeout_seconds} seconds (all agent threads busy)"
+                )
+            try:
+                data = future.result(timeout=timeout_seconds)
+            except FutureTimeoutError:
+                raise TimeoutError(f"Agent '{agent.name}' execution timed out after {timeout_seconds} seconds")
+
+            # Parallel auto-pilot posts share one rate limit, so back off instead of failing the post
+            # (an exhausted quota can't recover by waiting, so that 429 fails straight away)
+            error = data.get("error")
+            if (data["success"] or not isinstance(error, RateLimitError)
+                    or getattr(error, "code", None) == "insufficient_quota" or attempt == RATE_LIMIT_RETRIES):
+                break
+            delay = RATE_LIMIT_BACKOFF_SECONDS * (2 ** attempt) * random.uniform(0.5, 1.5)
+            print(f"⏳ Agent '{agent.name}' rate limited, retrying in {delay:.1f}s")
+            time.sleep(delay)
+
         if not data["success"]:
             print(f"❌ Agent '{agent.name}' execution failed: {data['error']}")
             raise data["error"]
@@ -390,8 +443,12 @@ BRAND CONTEXT:
             return self.brand_config.internal_link_targets
         return []
 
-    def create_blog_post(self, topic: str, reference_blog: str = None, requirements: str = "", status_callback=None, cached_style_guide: str = None, product_target: str = None, specific_pages: List[str] = None) -> Dict[str, str]:
-        """Main workflow: orchestrates all 7 agents to create style-matched blog post."""
+    def create_blog_post(self, topic: str, reference_blog: str = None, requirements: str = "", status_callback=None, cached_style_guide: str = None, product_target: str = None, specific_pages: List[str] = None, stage_callback=None) -> Dict[str, str]:
+        """Main workflow: orchestrates all 7 agents to create style-matched blog post.
+
+        stage_callback, if given, is called as stage_callback(stage, output) as soon as
+        each agent finishes, so callers can show partial results before the run ends.
+        """
         results = {}
 
         # Use effective reference blog (from param or brand config)
@@ -421,6 +478,8 @@ BRAND CONTEXT:
                 style_guide = self.analyze_blog_style(effective_reference_blog, status_callback, specific_pages)
 
             results["style_guide"] = style_guide
+            if stage_callback:
+                stage_callback("style_guide", results["style_guide"])
             
             # Step 2: Research topic (duplication check moved to topic generation phase)
             if status_callback:
@@ -439,6 +498,8 @@ BRAND CONTEXT:
             """
             research_result = self._run_agent_safely(self.agents["researcher"], research_prompt, timeout_seconds=600)
             results["research"] = research_result.final_output
+            if stage_callback:
+                stage_callback("research", results["research"])
             
             # Step 4: Write in matching style
             if status_callback:
@@ -470,6 +531,8 @@ BRAND CONTEXT:
             
             writing_result = self._run_agent_safely(self.agents["writer"], writing_prompt, timeout_seconds=600)
             results["draft"] = writing_result.final_output
+            if stage_callback:
+                stage_callback("draft", results["draft"])
             
             # Step 5: SEO Analysis of draft for optimization recommendations  
             if status_callback:
@@ -501,6 +564,8 @@ BRAND CONTEXT:
             except Exception as e:
                 print(f"❌ Initial SEO analysis failed: {e}")
                 results["initial_seo_analysis"] = f"Initial SEO analysis failed: {str(e)}"
+            if stage_callback:
+                stage_callback("initial_seo_analysis", results["initial_seo_analysis"])
             
             # Step 6: Add internal links (with SEO insights)
             if status_callback:
@@ -543,6 +608,8 @@ BRAND CONTEXT:
             
             linking_result = self._run_agent_safely(self.agents["internal_linker"], linking_prompt, timeout_seconds=600)
             results["with_links"] = linking_result.final_output
+            if stage_callback:
+                stage_callback("with_links", results["with_links"])
             
             # Step 7: Edit with SEO optimization while preserving style and links
             if status_callback:
@@ -573,6 +640,8 @@ BRAND CONTEXT:
             
             editing_result = self._run_agent_safely(self.agents["editor"], editing_prompt, timeout_seconds=600)
             results["final"] = editing_result.final_output
+            if stage_callback:
+                stage_callback("final", results["final"])
             
             # Step 8: Final SEO Analysis and Performance Assessment
             if status_callback:
@@ -599,6 +668,8 @@ BRAND CONTEXT:
             
             final_seo_result = self._run_agent_safely(self.agents["seo_analyzer"], final_seo_prompt, timeout_seconds=600)
             results["seo_analysis"] = final_seo_result.final_output
+            if stage_callback:
+                stage_callback("seo_analysis", results["seo_analysis"])
             
             if status_callback:
                 status_callback("✅ Blog post completed with SEO analysis!", 100)
@@ -614,11 +685,9 @@ BRAND CONTEXT:
     
     def parallel_research(self, topic: str, research_areas: List[str]) -> Dict[str, str]:
         """Unused function for parallel research - not integrated in main workflow."""
-        from concurrent.futures import ThreadPoolExecutor
-        
         def research_area(area: str) -> str:
             prompt = f"Research specifically about {area} in relation to {topic}"
-            result = Runner.run_sync(self.agents["researcher"], prompt)
+            result = Runner.run_sync(self.agents["researcher"], prompt, run_config=self._run_config())
             return result.final_output
         
         print(f"🔍 Conducting parallel research on {len(research_areas)} areas...")
@@ -824,8 +893,6 @@ IMPORTANT: Apply these brand-specific adjustments while maintaining the core for
 
     def _parse_topic_ideas(self, raw_output: str) -> List[Dict]:
         """Parse the agent's topic ideas output into structured format"""
-        import re
-
         topics = []
         lines = raw_output.split('\n')
 
@@ -835,7 +902,7 @@ IMPORTANT: Apply these brand-specific adjustments while maintaining the core for
             line = line.strip()
 
             # Match topic title (e.g., "## 1. Title Here" or "1. Title Here")
-            title_match = re.match(r'^#{0,2}\s*\d+\.\s*(.+)$', line)
+            title_match = _TOPIC_TITLE_RE.match(line)
             if title_match:
                 # Save previous topic
                 if current_topic and current_topic.get('title'):
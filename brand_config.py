@@ -6,8 +6,9 @@ Defines brand-specific settings for Slice, Klever, and PHC brands including
 style sources, product catalogs, keywords, and brand voice characteristics.
 """
 
+import functools
 from dataclasses import dataclass, field
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Tuple
 from enum import Enum
 
 
@@ -289,6 +290,7 @@ BRAND_CONFIGS: Dict[str, BrandConfig] = {
 }
 
 
+@functools.lru_cache(maxsize=32)
 def get_brand_config(brand_name: str) -> Optional[BrandConfig]:
     """
     Get configuration for a specific brand.
@@ -302,14 +304,15 @@ def get_brand_config(brand_name: str) -> Optional[BrandConfig]:
     return BRAND_CONFIGS.get(brand_name.lower())
 
 
-def get_all_brands() -> List[BrandConfig]:
+@functools.lru_cache(maxsize=32)
+def get_all_brands() -> Tuple[BrandConfig, ...]:
     """
     Get all configured brands.
 
     Returns:
-        List of BrandConfig objects
+        Tuple of BrandConfig objects (cached, so it is immutable)
     """
-    return list(BRAND_CONFIGS.values())
+    return tuple(BRAND_CONFIGS.values())
 
 
 def get_brand_names() -> List[str]:
@@ -10,10 +10,14 @@ os.environ['GRPC_VERBOSITY'] = 'ERROR'
 os.environ['GLOG_minloglevel'] = '2'
 
 import streamlit as st
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Optional
 from pytrends.request import TrendReq
 import time
 
+# Concurrent Google Ads keyword lookups while trend data is fetched
+GOOGLE_ADS_MAX_WORKERS = 4
+
 
 class KeywordResearcher:
     """Manages keyword research using Google Ads API and Google Trends"""
@@ -74,20 +78,22 @@ class KeywordResearcher:
                 # Clean up temp file
                 try:
                     os.unlink(temp_file_path)
-                except:
+                except OSError:
                     pass
 
         except Exception as e:
             st.warning(f"⚠️ Could not initialize Google Ads API: {str(e)}")
             self.google_ads_client = None
 
-    def get_keyword_ideas(self, seed_keywords: List[str], location: str = "US") -> List[Dict]:
+    def get_keyword_ideas(self, seed_keywords: List[str], location: str = "US", raise_errors: bool = False) -> List[Dict]:
         """
         Get keyword ideas and search volumes from Google Ads API
 
         Args:
             seed_keywords: List of seed keywords to expand
             location: Geographic location for keyword data
+            raise_errors: Re-raise API errors instead of showing a Streamlit warning,
+                for callers off the script thread where st.warning is a no-op
 
         Returns:
             List of dicts with keyword data
@@ -133,6 +139,8 @@ class KeywordResearcher:
             return keyword_ideas[:50]  # Limit to top 50
 
         except Exception as e:
+            if raise_errors:
+                raise
             st.warning(f"⚠️ Google Ads API error: {str(e)}")
             return []
 
@@ -230,47 +238,71 @@ class KeywordResearcher:
             Topics enriched with search volume, competition, and trend data
         """
         for topic in topics:
-            keywords = topic.get('keywords', [])
-
-            if not keywords:
+            if not topic.get('keywords', []):
                 # Extract keywords from title
-                keywords = [word.lower() for word in topic['title'].split() if len(word) > 3][:3]
-                topic['keywords'] = keywords
-
-            # Get trend data (always available)
-            trend_scores = self.get_trend_data(keywords)
-            topic['trend_score'] = max(trend_scores.values()) if trend_scores else 0
-            topic['trend_status'] = self._get_trend_status(topic['trend_score'])
-
-            # Get keyword data from Google Ads if available
-            if self.google_ads_client:
-                keyword_ideas = self.get_keyword_ideas(keywords)
-
-                if keyword_ideas:
-                    # Use the best keyword data
-                    best_keyword = max(keyword_ideas, key=lambda x: x['avg_monthly_searches'])
-                    topic['search_volume'] = best_keyword['avg_monthly_searches']
-                    topic['competition'] = best_keyword['competition']
-                    topic['competition_index'] = best_keyword['competition_index']
-                else:
-                    topic['search_volume'] = 'N/A'
-                    topic['competition'] = 'N/A'
-            else:
-                # Without Google Ads, provide trend-based estimate
-                # Trend score (0-100) can indicate relative interest
-                trend_score = topic.get('trend_score', 0)
-                if trend_score >= 75:
-                    topic['search_volume'] = 'High (trend-based)'
-                elif trend_score >= 50:
-                    topic['search_volume'] = 'Medium (trend-based)'
-                elif trend_score >= 25:
-                    topic['search_volume'] = 'Low (trend-based)'
-                else:
-                    topic['search_volume'] = 'Minimal (trend-based)'
-                topic['competition'] = 'Enable Google Ads for data'
+                topic['keywords'] = [word.lower() for word in topic['title'].split() if len(word) > 3][:3]
+
+        # Google Ads lookups are independent per topic, so they run on a pool while the
+        # rate-limited Trends requests below stay sequential (pytrends keeps per-request state)
+        ads_futures = []
+        ads_executor = None
+        if self.google_ads_client:
+            ads_executor = ThreadPoolExecutor(max_workers=GOOGLE_ADS_MAX_WORKERS, thread_name_prefix="google-ads-")
+            ads_futures = [
+                ads_executor.submit(self.get_keyword_ideas, topic['keywords'], raise_errors=True) for topic in topics
+            ]
+
+        try:
+            for i, topic in enumerate(topics):
+                keyword_ideas = None
+                if ads_futures:
+                    # Pool threads have no Streamlit context, so errors are reported from here
+                    try:
+                        keyword_ideas = ads_futures[i].result()
+                    except Exception as e:
+                        st.warning(f"⚠️ Google Ads API error: {str(e)}")
+                        keyword_ideas = []
+                self._apply_keyword_data(topic, keyword_ideas)
+        finally:
+            if ads_executor:
+                ads_executor.shutdown(wait=False, cancel_futures=True)
 
         return topics
 
+    def _apply_keyword_data(self, topic: Dict, keyword_ideas: Optional[List[Dict]]):
+        """Fill in trend data and search volume/competition for a single topic"""
+        keywords = topic['keywords']
+
+        # Get trend data (always available)
+        trend_scores = self.get_trend_data(keywords)
+        topic['trend_score'] = max(trend_scores.values()) if trend_scores else 0
+        topic['trend_status'] = self._get_trend_status(topic['trend_score'])
+
+        # Get keyword data from Google Ads if available
+        if self.google_ads_client:
+            if keyword_ideas:
+                # Use the best keyword data
+                best_keyword = max(keyword_ideas, key=lambda x: x['avg_monthly_searches'])
+                topic['search_volume'] = best_keyword['avg_monthly_searches']
+                topic['competition'] = best_keyword['competition']
+                topic['competition_index'] = best_keyword['competition_index']
+            else:
+                topic['search_volume'] = 'N/A'
+                topic['competition'] = 'N/A'
+        else:
+            # Without Google Ads, provide trend-based estimate
+            # Trend score (0-100) can indicate relative interest
+            trend_score = topic.get('trend_score', 0)
+            if trend_score >= 75:
+                topic['search_volume'] = 'High (trend-based)'
+            elif trend_score >= 50:
+                topic['search_volume'] = 'Medium (trend-based)'
+            elif trend_score >= 25:
+                topic['search_volume'] = 'Low (trend-based)'
+            else:
+                topic['search_volume'] = 'Minimal (trend-based)'
+            topic['competition'] = 'Enable Google Ads for data'
+
     def _get_trend_status(self, score: int) -> str:
         """Get trend status emoji based on score"""
         if score >= 75:
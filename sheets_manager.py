@@ -1,16 +1,17 @@
 #!/usr/bin/env python3
 import json
+import traceback
 import gspread
 from google.oauth2.service_account import Credentials
-from datetime import datetime
-from typing import Optional, Dict, List
+from datetime import datetime, timedelta
+from typing import Optional, Dict, List, Tuple, Union
 import streamlit as st
 
 class SheetsManager:
     """Manages Google Sheets integration for BlogAgents app with multi-brand support"""
 
-    def __init__(self, service_account_json: str, spreadsheet_id: str):
-        """Initialize with user-provided service account JSON and spreadsheet ID"""
+    def __init__(self, service_account_json: Union[str, Dict], spreadsheet_id: str):
+        """Initialize with user-provided service account JSON (raw string or parsed dict) and spreadsheet ID"""
         self.service_account_json = service_account_json
         self.spreadsheet_id = spreadsheet_id
         self.gc = None
@@ -30,8 +31,11 @@ class SheetsManager:
     def _initialize_client(self):
         """Initialize Google Sheets client with service account credentials"""
         try:
-            # Parse service account JSON
-            service_account_info = json.loads(self.service_account_json)
+            # Parse service account JSON (already-parsed dicts are used as-is)
+            if isinstance(self.service_account_json, dict):
+                service_account_info = self.service_account_json
+            else:
+                service_account_info = json.loads(self.service_account_json)
 
             # Define scopes
             scopes = [
@@ -195,6 +199,42 @@ class SheetsManager:
         except Exception as e:
             st.warning(f"Could not save style guide: {str(e)}")
 
+    def _build_content_row(self, topic: str, source_blog: str, content_data: Dict, brand_value: str,
+                           created_at: datetime = None, batch_index: int = 0) -> List:
+        """Build a Generated_Content row for a generated post; batch_index keeps batched IDs unique."""
+        created_at = created_at or datetime.now()
+
+        # Generate ID; posts collected in the same rerun share created_at, so space them
+        # apart by 1/10 ms within the batch like topic idea IDs
+        content_id = (created_at + timedelta(microseconds=100 * batch_index)).strftime('%Y%m%d_%H%M%S_%f')[:20]
+
+        # Calculate word count
+        word_count = len(content_data.get('final', '').split())
+
+        # Extract SEO score if available
+        seo_score = ''
+        if 'seo_analysis' in content_data:
+            seo_text = content_data['seo_analysis']
+            score_line = next((line for line in seo_text.splitlines() if 'SEO SCORE:' in line), None)
+            if score_line is not None:
+                try:
+                    seo_score = score_line.split(':', 1)[1].strip().split('/', 1)[0]
+                except IndexError:
+                    pass
+
+        return [
+            content_id,
+            brand_value,
+            topic,
+            source_blog,
+            created_at.strftime('%Y-%m-%d %H:%M:%S'),
+            'Generated',
+            content_data.get('final', ''),
+            seo_score,
+            word_count,
+            ''  # User notes - empty initially
+        ]
+
     def save_generated_content(self, topic: str, source_blog: str, content_data: Dict, brand: str = None):
         """
         Save generated content to sheets with brand context.
@@ -209,40 +249,101 @@ class SheetsManager:
             worksheet = self.spreadsheet.worksheet('Generated_Content')
             brand_value = brand or self.current_brand or ''
 
-            # Generate ID (simple timestamp-based)
-            content_id = datetime.now().strftime('%Y%m%d_%H%M%S')
+            row_data = self._build_content_row(topic, source_blog, content_data, brand_value)
 
-            # Calculate word count
-            word_count = len(content_data.get('final', '').split())
+            worksheet.append_row(row_data)
 
-            # Extract SEO score if available
-            seo_score = ''
-            if 'seo_analysis' in content_data:
-                seo_text = content_data['seo_analysis']
-                if 'SEO SCORE:' in seo_text:
-                    try:
-                        score_line = [line for line in seo_text.split('\n') if 'SEO SCORE:' in line][0]
-                        seo_score = score_line.split(':')[1].strip().split('/')[0]
-                    except:
-                        pass
+        except Exception as e:
+            st.warning(f"Could not save content: {str(e)}")
 
-            row_data = [
-                content_id,
-                brand_value,
-                topic,
-                source_blog,
-                datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                'Generated',
-                content_data.get('final', ''),
-                seo_score,
-                word_count,
-                ''  # User notes - empty initially
-            ]
+    def batch_save(self, entries: List[Dict], brand: str = None):
+        """
+        Save several generated posts using a fixed number of Sheets API calls.
 
-            worksheet.append_row(row_data)
+        Combines save_generated_content, update_blog_source_stats and mark_topic_used
+        for every entry, so multi-post auto-pilot runs stay under the write quota.
+
+        Args:
+            entries: List of dicts with 'topic', 'source_blog', 'content_data',
+                and optional 'topic_id' and 'created_at' (datetime)
+            brand: Optional brand (uses current_brand if not specified)
+        """
+        if not entries:
+            return
+
+        try:
+            brand_value = brand or self.current_brand or ''
+            today = datetime.now().strftime('%Y-%m-%d')
+            cell_updates = []
+
+            # Save all generated content in a single append
+            content_rows = [
+                self._build_content_row(
+                    entry['topic'],
+                    entry['source_blog'],
+                    entry['content_data'],
+                    brand_value,
+                    entry.get('created_at'),
+                    batch_index=i
+                )
+                for i, entry in enumerate(entries)
+            ]
+            self.spreadsheet.worksheet('Generated_Content').append_rows(content_rows)
+
+            # Update blog source stats once per domain
+            success_counts = {}
+            for entry in entries:
+                success_counts[entry['source_blog']] = success_counts.get(entry['source_blog'], 0) + 1
+
+            sources_worksheet = self.spreadsheet.worksheet('Blog_Sources')
+            records = sources_worksheet.get_all_records()
+            new_source_rows = []
+
+            for domain, count in success_counts.items():
+                existing_row = None
+                for i, record in enumerate(records):
+                    domain_match = record.get('Domain', '').lower() == domain.lower()
+                    brand_match = record.get('Brand', '').lower() == brand_value.lower()
+                    if domain_match and brand_match:
+                        existing_row = i + 2
+                        break
+
+                if existing_row:
+                    # E=Last_Analyzed, F=Success_Count
+                    current_success = int(records[existing_row-2].get('Success_Count', 0))
+                    cell_updates.append({
+                        'range': f'Blog_Sources!E{existing_row}:F{existing_row}',
+                        'values': [[today, current_success + count]]
+                    })
+                else:
+                    new_source_rows.append([
+                        brand_value,
+                        domain,
+                        'Unknown',  # Category - can be filled manually
+                        5,  # Quality rating
+                        today,
+                        count,  # Success count
+                        'Auto-created',
+                        '',  # Topics_JSON
+                        ''   # Topics_Last_Updated
+                    ])
+
+            if new_source_rows:
+                sources_worksheet.append_rows(new_source_rows)
+
+            # Mark all consumed topic ideas as used
+            topic_ids = {entry['topic_id'] for entry in entries if entry.get('topic_id')}
+            cell_updates.extend(self._topic_used_updates(topic_ids, today))
+
+            # Apply all cell updates across sheets in one batchUpdate request
+            if cell_updates:
+                self.spreadsheet.values_batch_update({
+                    'valueInputOption': 'RAW',
+                    'data': cell_updates
+                })
 
         except Exception as e:
-            st.warning(f"Could not save content: {str(e)}")
+            st.warning(f"Could not batch save content: {str(e)}")
 
     def update_blog_source_stats(self, domain: str, success: bool = True, brand: str = None):
         """
@@ -271,8 +372,8 @@ class SheetsManager:
                 current_success = int(records[existing_row-2].get('Success_Count', 0))
                 new_success = current_success + (1 if success else 0)
 
-                worksheet.update(f'F{existing_row}', [[new_success]])  # Success_Count is now column F
-                worksheet.update(f'E{existing_row}', [[datetime.now().strftime('%Y-%m-%d')]])  # Last_Analyzed is now column E
+                # Last_Analyzed (E) and Success_Count (F) in one request
+                worksheet.update(f'E{existing_row}:F{existing_row}', [[datetime.now().strftime('%Y-%m-%d'), new_success]])
             else:
                 # Create new entry with brand
                 row_data = [
@@ -302,20 +403,7 @@ class SheetsManager:
         try:
             worksheet = self.spreadsheet.worksheet('Generated_Content')
             records = worksheet.get_all_records()
-            brand_filter = brand or self.current_brand
-
-            # Filter by brand if specified
-            if brand_filter:
-                records = [r for r in records if r.get('Brand', '').lower() == brand_filter.lower()]
-
-            # Sort by date (most recent first) and limit
-            sorted_records = sorted(
-                records,
-                key=lambda x: x.get('Date_Created', ''),
-                reverse=True
-            )
-
-            return sorted_records[:limit]
+            return self._recent_content(records, limit, brand or self.current_brand)
 
         except Exception as e:
             st.warning(f"Could not retrieve content history: {str(e)}")
@@ -331,24 +419,81 @@ class SheetsManager:
         try:
             worksheet = self.spreadsheet.worksheet('Blog_Sources')
             records = worksheet.get_all_records()
-            brand_filter = brand or self.current_brand
+            return self._ranked_sources(records, brand or self.current_brand)
 
-            # Filter by brand if specified
-            if brand_filter:
-                records = [r for r in records if r.get('Brand', '').lower() == brand_filter.lower()]
+        except Exception as e:
+            st.warning(f"Could not retrieve blog source stats: {str(e)}")
+            return []
 
-            # Sort by success count
-            sorted_records = sorted(
-                records,
-                key=lambda x: int(x.get('Success_Count', 0)),
-                reverse=True
+    def get_history_and_stats(self, limit: int = 10, brand: str = None) -> Tuple[List[Dict], List[Dict]]:
+        """
+        Get content history and blog source stats with a single batchGet request.
+
+        Args:
+            limit: Maximum number of history records to return
+            brand: Optional brand filter (uses current_brand if not specified)
+
+        Returns:
+            Tuple of (history records, blog source stats), as returned by
+            get_content_history and get_blog_source_stats
+        """
+        try:
+            response = self.spreadsheet.values_batch_get(
+                ['Generated_Content', 'Blog_Sources'],
+                params={'valueRenderOption': 'UNFORMATTED_VALUE'}
             )
+            content_range, sources_range = response.get('valueRanges', [{}, {}])
+            brand_filter = brand or self.current_brand
 
-            return sorted_records
+            return (
+                self._recent_content(self._rows_to_records(content_range.get('values', [])), limit, brand_filter),
+                self._ranked_sources(self._rows_to_records(sources_range.get('values', [])), brand_filter)
+            )
 
         except Exception as e:
-            st.warning(f"Could not retrieve blog source stats: {str(e)}")
+            st.warning(f"Could not retrieve content history: {str(e)}")
+            return [], []
+
+    @staticmethod
+    def _rows_to_records(values: List[List]) -> List[Dict]:
+        """Turn raw sheet rows (header row first) into dicts like get_all_records()"""
+        if not values:
             return []
+        headers = values[0]
+        return [
+            dict(zip(headers, row + [''] * (len(headers) - len(row))))
+            for row in values[1:]
+        ]
+
+    @staticmethod
+    def _recent_content(records: List[Dict], limit: int, brand_filter: Optional[str]) -> List[Dict]:
+        """Filter content records by brand and return the most recent first"""
+        # Filter by brand if specified
+        if brand_filter:
+            records = [r for r in records if r.get('Brand', '').lower() == brand_filter.lower()]
+
+        # Sort by date (most recent first) and limit
+        sorted_records = sorted(
+            records,
+            key=lambda x: x.get('Date_Created', ''),
+            reverse=True
+        )
+
+        return sorted_records[:limit]
+
+    @staticmethod
+    def _ranked_sources(records: List[Dict], brand_filter: Optional[str]) -> List[Dict]:
+        """Filter blog source records by brand and sort by success count"""
+        # Filter by brand if specified
+        if brand_filter:
+            records = [r for r in records if r.get('Brand', '').lower() == brand_filter.lower()]
+
+        # Sort by success count
+        return sorted(
+            records,
+            key=lambda x: int(x.get('Success_Count', 0)),
+            reverse=True
+        )
 
     def save_topic_ideas(self, source_blog: str, topics: List[Dict], brand: str = None):
         """
@@ -362,19 +507,22 @@ class SheetsManager:
         try:
             worksheet = self.spreadsheet.worksheet('Topic_Ideas')
             brand_value = brand or self.current_brand or ''
+            created_at = datetime.now()
+            created_date = created_at.strftime('%Y-%m-%d %H:%M:%S')
 
-            for topic in topics:
-                # Generate ID
-                topic_id = datetime.now().strftime('%Y%m%d_%H%M%S_%f')[:20]
+            rows = []
+            for i, topic in enumerate(topics):
+                # Generate ID; IDs keep 1/10 ms resolution, so space them apart within the batch
+                topic_id = (created_at + timedelta(microseconds=100 * i)).strftime('%Y%m%d_%H%M%S_%f')[:20]
 
                 # Add ID to the topic object for later reference
                 topic['ID'] = topic_id
 
-                row_data = [
+                rows.append([
                     topic_id,
                     brand_value,
                     source_blog,
-                    datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                    created_date,
                     topic.get('title', ''),
                     topic.get('angle', ''),
                     ', '.join(topic.get('keywords', [])),
@@ -385,9 +533,11 @@ class SheetsManager:
                     topic.get('trend_score', 0),
                     'Generated',  # Status
                     ''  # Used_Date - empty initially
-                ]
+                ])
 
-                worksheet.append_row(row_data)
+            # One append request for the whole batch instead of one per topic
+            if rows:
+                worksheet.append_rows(rows)
 
         except Exception as e:
             st.warning(f"Could not save topic ideas: {str(e)}")
@@ -494,21 +644,50 @@ class SheetsManager:
 
     def mark_topic_used(self, topic_id: str):
         """Mark a topic idea as used"""
-        try:
-            worksheet = self.spreadsheet.worksheet('Topic_Ideas')
-            records = worksheet.get_all_records()
+        self.mark_topics_used_batch([topic_id])
 
-            for i, record in enumerate(records):
-                if record.get('ID') == topic_id:
-                    row_num = i + 2  # +2 for header and 0-based index
-                    # Column M=Status, N=Used_Date (shifted due to Brand column)
-                    worksheet.update(f'M{row_num}', [['Used']])
-                    worksheet.update(f'N{row_num}', [[datetime.now().strftime('%Y-%m-%d')]])
-                    break
+    def mark_topics_used_batch(self, topic_ids: List[str], raise_errors: bool = False):
+        """
+        Mark several topic ideas as used with one read and one batchUpdate request.
+
+        Args:
+            topic_ids: IDs of the topic ideas to mark
+            raise_errors: Re-raise failures instead of showing a Streamlit warning,
+                for callers off the script thread where st.warning is a no-op
+        """
+        if not topic_ids:
+            return
+
+        try:
+            cell_updates = self._topic_used_updates(set(topic_ids), datetime.now().strftime('%Y-%m-%d'))
+            if cell_updates:
+                self.spreadsheet.values_batch_update({
+                    'valueInputOption': 'RAW',
+                    'data': cell_updates
+                })
 
         except Exception as e:
+            if raise_errors:
+                raise
             st.warning(f"Could not mark topic as used: {str(e)}")
 
+    def _topic_used_updates(self, topic_ids: set, used_date: str) -> List[Dict]:
+        """Build batchUpdate ranges that set Status/Used_Date for the given topic IDs."""
+        if not topic_ids:
+            return []
+
+        cell_updates = []
+        records = self.spreadsheet.worksheet('Topic_Ideas').get_all_records()
+        for i, record in enumerate(records):
+            if record.get('ID') in topic_ids:
+                row_num = i + 2  # +2 for header and 0-based index
+                # Column M=Status, N=Used_Date (shifted due to Brand column)
+                cell_updates.append({
+                    'range': f'Topic_Ideas!M{row_num}:N{row_num}',
+                    'values': [['Used', used_date]]
+                })
+        return cell_updates
+
     def get_cached_blog_topics(self, blog_url: str, brand: str = None) -> Optional[Dict]:
         """
         Get cached blog topics from Blog_Sources sheet
@@ -536,7 +715,6 @@ class SheetsManager:
                     last_updated = record.get('Topics_Last_Updated', '')
 
                     if topics_json:
-                        import json
                         topics = json.loads(topics_json)
                         return {
                             'topics': topics,
@@ -559,7 +737,6 @@ class SheetsManager:
             brand: Optional brand (uses current_brand if not specified)
         """
         try:
-            import json
             brand_value = brand or self.current_brand or ''
             print(f"📝 Attempting to save {len(topics)} topics for {blog_url} (brand: {brand_value})")
             worksheet = self.spreadsheet.worksheet('Blog_Sources')
@@ -582,9 +759,8 @@ class SheetsManager:
             if row_num:
                 # Update existing row (columns shifted due to Brand column)
                 # H=Topics_JSON, I=Topics_Last_Updated
-                print(f"📝 Writing to H{row_num} and I{row_num}")
-                worksheet.update(f'H{row_num}', [[topics_json]])   # Topics_JSON column
-                worksheet.update(f'I{row_num}', [[timestamp]])      # Topics_Last_Updated column
+                print(f"📝 Writing to H{row_num}:I{row_num}")
+                worksheet.update(f'H{row_num}:I{row_num}', [[topics_json, timestamp]])
             else:
                 # Add new row with brand
                 print(f"➕ Adding new row for {blog_url}")
@@ -604,7 +780,6 @@ class SheetsManager:
 
         except Exception as e:
             print(f"❌ Error saving blog topics: {str(e)}")
-            import traceback
             print(traceback.format_exc())
 
     def get_brand_stats(self, brand: str = None) -> Dict:
@@ -681,7 +856,7 @@ class SheetsManager:
             }
 
 
-def create_sheets_manager(service_account_json: str, spreadsheet_id: str) -> Optional[SheetsManager]:
+def create_sheets_manager(service_account_json: Union[str, Dict], spreadsheet_id: str) -> Optional[SheetsManager]:
     """Factory function to create SheetsManager with error handling"""
     try:
         manager = SheetsManager(service_account_json, spreadsheet_id)